@@ -0,0 +1,474 @@
+# ###  file:       benchmark.py  ### #
+# ###  name: ipp project no. 2  ### #
+# ###  author:        xdudaj02  ### #
+# ###  date:          8.4.2021  ### #
+# ###  version:            1.0  ### #
+
+import subprocess
+import tempfile
+import json
+import time
+import sys
+import os
+import re
+
+# NOT SUPPORTED:
+# filenames containing whitespace
+
+# ### GLOBAL VARIABLES ### #
+# default interpreter (interpret.py next to this file)
+default_interpreter = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interpret.py')
+
+# default number of loop iterations and repeated runs (best run is reported)
+default_iterations = 100000
+default_repeat = 3
+
+# default slowdown (in percent) of instructions/s or growth of peak memory reported as regression by compare
+default_threshold = 5.0
+
+# dict of benchmarks: name -> (description, variants of interpreter options which are compared), the first variant
+# is always without options (baseline which every interpreter runs the same way)
+benchmarks = {'arith': ('tight arithmetic loop', [[], ['--max-time=3600'], ['--jit']]),
+              'output': ('per-character output loop', [[], ['--output-buffer=0']]),
+              'recursion': ('recursive calls', [[], ['--jit']]),
+              'strings': ('string processing loop', [[], ['--jit']]),
+              'stack': ('stack expression loop', [[], ['--max-stack=1000']]),
+              'frames': ('frame push and pop loop', [[], ['--jit']]),
+              'io': ('reading and writing loop', [[], ['--output-buffer=0']]),
+              'deep': ('deep recursion with frames', [[], ['--jit']]),
+              'unwind': ('deep recursion returning through every level', [[], ['--jit']]),
+              }
+
+# depth of recursion of recursion benchmark
+recursion_depth = 20
+
+
+# ### FUNCTIONS ### #
+# displays program usage help
+def display_help():
+    print('''benchmark.py  |  version 1.0  |  xdudaj02
+benchmark of IPPcode21 interpreter
+
+USAGE:
+  python3.8 benchmark.py [--benchmark=name] [--iterations=N] [--repeat=N] [--json=file] [interpreter ...]
+  python3.8 benchmark.py --compare [--threshold=P] old.json new.json
+  python3.8 benchmark.py --help
+
+ARGUMENTS:
+  interpreter         path to interpret.py to measure (default is interpret.py next to this file),
+    -more interpreters can be given to compare them (e.g. older version of interpret.py), every benchmark
+     runs each of them without options first, variants with options which an interpreter does not list
+     in its --help are skipped for it
+  --benchmark=name    benchmark to run (default all of them):
+    arith             tight arithmetic loop, plain, with time limit (--max-time) and with block compiler (--jit)
+    output            per-character output loop, buffered and unbuffered (--output-buffer=0) output are compared
+    recursion         recursive calls using CALL and RETURN, plain and with block compiler (--jit)
+    strings           string processing loop (CONCAT, STRLEN, GETCHAR), plain and with block compiler (--jit)
+    stack             expression evaluation using PUSHS and POPS, unbounded and bounded stack (--max-stack)
+    frames            CREATEFRAME, PUSHFRAME and POPFRAME in a loop, plain and with block compiler (--jit)
+    io                READ of an integer and its WRITE per iteration, buffered and unbuffered output
+    deep              recursion as deep as number of iterations, every level uses its own frame and ends
+                      with a tail call (CALL followed by RETURN), plain and with block compiler (--jit)
+    unwind            recursion as deep as number of iterations, every level uses its own frame and returns
+                      through it after the call (no tail calls), plain and with block compiler (--jit)
+  --iterations=N      number of loop iterations (default 100000)
+  --repeat=N          number of runs of each interpreter, best one is reported (default 3)
+    -instructions executed by each benchmark are counted by one more run of interpret.py next to this file
+     with --profile, instructions of the source program are counted (fused instructions as the instructions
+     they replaced), so instructions/s of different interpreters are comparable
+  --json=file         results (time, instructions/s and peak memory of every run) are stored in given json file
+  --compare           compares results stored by two runs, every benchmark whose instructions/s dropped
+                      or peak memory grew by more than threshold is reported, exit code 1 if there is any
+  --threshold=P       regression threshold in percent (default 5)
+          ''')
+
+
+# returns IPPcode21 xml source of a tight arithmetic loop
+def arithmetic_loop(iterations):
+    body = [('ADD', [('var', 'GF@s'), ('var', 'GF@s'), ('var', 'GF@i')]),
+            ('MUL', [('var', 'GF@s'), ('var', 'GF@s'), ('int', '1')]),
+            ('SUB', [('var', 'GF@s'), ('var', 'GF@s'), ('int', '0')]),
+            ('ADD', [('var', 'GF@i'), ('var', 'GF@i'), ('int', '1')]),
+            ('JUMPIFNEQ', [('label', 'loop'), ('var', 'GF@i'), ('int', str(iterations))])]
+    program = [('DEFVAR', [('var', 'GF@i')]),
+               ('DEFVAR', [('var', 'GF@s')]),
+               ('MOVE', [('var', 'GF@i'), ('int', '0')]),
+               ('MOVE', [('var', 'GF@s'), ('int', '0')]),
+               ('LABEL', [('label', 'loop')])] + body + [('WRITE', [('var', 'GF@s')])]
+    return program_xml(program)
+
+
+# returns IPPcode21 xml source of a loop writing one character per iteration
+def output_loop(iterations):
+    body = [('WRITE', [('string', 'x')]),
+            ('WRITE', [('var', 'GF@i')]),
+            ('WRITE', [('string', '\\010')]),
+            ('ADD', [('var', 'GF@i'), ('var', 'GF@i'), ('int', '1')]),
+            ('JUMPIFNEQ', [('label', 'loop'), ('var', 'GF@i'), ('int', str(iterations))])]
+    program = [('DEFVAR', [('var', 'GF@i')]),
+               ('MOVE', [('var', 'GF@i'), ('int', '0')]),
+               ('LABEL', [('label', 'loop')])] + body
+    return program_xml(program)
+
+
+# returns IPPcode21 xml source of a loop calling recursive function
+def recursion_loop(iterations):
+    program = [('DEFVAR', [('var', 'GF@i')]),
+               ('DEFVAR', [('var', 'GF@n')]),
+               ('DEFVAR', [('var', 'GF@s')]),
+               ('MOVE', [('var', 'GF@i'), ('int', '0')]),
+               ('MOVE', [('var', 'GF@s'), ('int', '0')]),
+               ('LABEL', [('label', 'loop')]),
+               ('MOVE', [('var', 'GF@n'), ('int', str(recursion_depth))]),
+               ('CALL', [('label', 'sum')]),
+               ('ADD', [('var', 'GF@i'), ('var', 'GF@i'), ('int', '1')]),
+               ('JUMPIFNEQ', [('label', 'loop'), ('var', 'GF@i'), ('int', str(iterations))]),
+               ('WRITE', [('var', 'GF@s')]),
+               ('EXIT', [('int', '0')]),
+               ('LABEL', [('label', 'sum')]),
+               ('JUMPIFEQ', [('label', 'sum_end'), ('var', 'GF@n'), ('int', '0')]),
+               ('SUB', [('var', 'GF@n'), ('var', 'GF@n'), ('int', '1')]),
+               ('CALL', [('label', 'sum')]),
+               ('ADD', [('var', 'GF@n'), ('var', 'GF@n'), ('int', '1')]),  # work after the call (no tail call)
+               ('ADD', [('var', 'GF@s'), ('var', 'GF@s'), ('var', 'GF@n')]),
+               ('LABEL', [('label', 'sum_end')]),
+               ('RETURN', [])]
+    return program_xml(program)
+
+
+# returns IPPcode21 xml source of a loop building and reading a string
+def string_loop(iterations):
+    body = [('CONCAT', [('var', 'GF@s'), ('var', 'GF@s'), ('string', 'ab')]),
+            ('STRLEN', [('var', 'GF@n'), ('var', 'GF@s')]),
+            ('GETCHAR', [('var', 'GF@c'), ('var', 'GF@s'), ('var', 'GF@i')]),
+            ('CONCAT', [('var', 'GF@t'), ('var', 'GF@c'), ('string', 'x')]),
+            ('ADD', [('var', 'GF@i'), ('var', 'GF@i'), ('int', '1')]),
+            ('JUMPIFNEQ', [('label', 'loop'), ('var', 'GF@i'), ('int', str(iterations))])]
+    program = [('DEFVAR', [('var', 'GF@s')]),
+               ('DEFVAR', [('var', 'GF@n')]),
+               ('DEFVAR', [('var', 'GF@c')]),
+               ('DEFVAR', [('var', 'GF@t')]),
+               ('DEFVAR', [('var', 'GF@i')]),
+               ('MOVE', [('var', 'GF@s'), ('string', '')]),
+               ('MOVE', [('var', 'GF@i'), ('int', '0')]),
+               ('LABEL', [('label', 'loop')])] + body + [('WRITE', [('var', 'GF@n')])]
+    return program_xml(program)
+
+
+# returns IPPcode21 xml source of a loop evaluating expressions on the stack
+def stack_loop(iterations):
+    body = [('PUSHS', [('var', 'GF@i')]),
+            ('PUSHS', [('int', '2')]),
+            ('PUSHS', [('var', 'GF@s')]),
+            ('POPS', [('var', 'GF@a')]),
+            ('POPS', [('var', 'GF@b')]),
+            ('ADD', [('var', 'GF@s'), ('var', 'GF@a'), ('var', 'GF@b')]),
+            ('POPS', [('var', 'GF@a')]),
+            ('SUB', [('var', 'GF@s'), ('var', 'GF@s'), ('var', 'GF@a')]),
+            ('ADD', [('var', 'GF@i'), ('var', 'GF@i'), ('int', '1')]),
+            ('JUMPIFNEQ', [('label', 'loop'), ('var', 'GF@i'), ('int', str(iterations))])]
+    program = [('DEFVAR', [('var', 'GF@i')]),
+               ('DEFVAR', [('var', 'GF@s')]),
+               ('DEFVAR', [('var', 'GF@a')]),
+               ('DEFVAR', [('var', 'GF@b')]),
+               ('MOVE', [('var', 'GF@i'), ('int', '0')]),
+               ('MOVE', [('var', 'GF@s'), ('int', '0')]),
+               ('LABEL', [('label', 'loop')])] + body + [('WRITE', [('var', 'GF@s')])]
+    return program_xml(program)
+
+
+# returns IPPcode21 xml source of a loop pushing and popping temporary frames
+def frame_loop(iterations):
+    body = [('CREATEFRAME', []),
+            ('DEFVAR', [('var', 'TF@x')]),
+            ('MOVE', [('var', 'TF@x'), ('var', 'GF@i')]),
+            ('PUSHFRAME', []),
+            ('ADD', [('var', 'GF@i'), ('var', 'LF@x'), ('int', '1')]),
+            ('POPFRAME', []),
+            ('JUMPIFNEQ', [('label', 'loop'), ('var', 'GF@i'), ('int', str(iterations))])]
+    program = [('DEFVAR', [('var', 'GF@i')]),
+               ('MOVE', [('var', 'GF@i'), ('int', '0')]),
+               ('LABEL', [('label', 'loop')])] + body + [('WRITE', [('var', 'TF@x')])]
+    return program_xml(program)
+
+
+# returns IPPcode21 xml source of a loop reading and writing one integer per iteration, input of the program is
+# generated by io_input
+def io_loop(iterations):
+    body = [('READ', [('var', 'GF@x'), ('type', 'int')]),
+            ('ADD', [('var', 'GF@s'), ('var', 'GF@s'), ('var', 'GF@x')]),
+            ('WRITE', [('var', 'GF@x')]),
+            ('WRITE', [('string', '\\010')]),
+            ('ADD', [('var', 'GF@i'), ('var', 'GF@i'), ('int', '1')]),
+            ('JUMPIFNEQ', [('label', 'loop'), ('var', 'GF@i'), ('int', str(iterations))])]
+    program = [('DEFVAR', [('var', 'GF@i')]),
+               ('DEFVAR', [('var', 'GF@s')]),
+               ('DEFVAR', [('var', 'GF@x')]),
+               ('MOVE', [('var', 'GF@i'), ('int', '0')]),
+               ('MOVE', [('var', 'GF@s'), ('int', '0')]),
+               ('LABEL', [('label', 'loop')])] + body + [('WRITE', [('var', 'GF@s')])]
+    return program_xml(program)
+
+
+# returns input of io benchmark (one integer per line)
+def io_input(iterations):
+    return ''.join(str(number) + '\n' for number in range(iterations))
+
+
+# returns IPPcode21 xml source of recursion as deep as number of iterations
+def deep_recursion(iterations):
+    program = [('DEFVAR', [('var', 'GF@n')]),
+               ('DEFVAR', [('var', 'GF@s')]),
+               ('MOVE', [('var', 'GF@n'), ('int', str(iterations))]),
+               ('MOVE', [('var', 'GF@s'), ('int', '0')]),
+               ('CALL', [('label', 'rec')]),
+               ('WRITE', [('var', 'GF@s')]),
+               ('EXIT', [('int', '0')]),
+               ('LABEL', [('label', 'rec')]),
+               ('JUMPIFEQ', [('label', 'rec_end'), ('var', 'GF@n'), ('int', '0')]),
+               ('CREATEFRAME', []),
+               ('DEFVAR', [('var', 'TF@x')]),
+               ('MOVE', [('var', 'TF@x'), ('var', 'GF@n')]),
+               ('PUSHFRAME', []),
+               ('ADD', [('var', 'GF@s'), ('var', 'GF@s'), ('var', 'LF@x')]),
+               ('POPFRAME', []),
+               ('SUB', [('var', 'GF@n'), ('var', 'GF@n'), ('int', '1')]),
+               ('CALL', [('label', 'rec')]),
+               ('RETURN', []),
+               ('LABEL', [('label', 'rec_end')]),
+               ('RETURN', [])]
+    return program_xml(program)
+
+
+# returns IPPcode21 xml source of recursion as deep as number of iterations which uses frames of all levels when
+# returning (calls are not tail calls)
+def unwinding_recursion(iterations):
+    program = [('DEFVAR', [('var', 'GF@n')]),
+               ('DEFVAR', [('var', 'GF@s')]),
+               ('MOVE', [('var', 'GF@n'), ('int', str(iterations))]),
+               ('MOVE', [('var', 'GF@s'), ('int', '0')]),
+               ('CALL', [('label', 'rec')]),
+               ('WRITE', [('var', 'GF@s')]),
+               ('EXIT', [('int', '0')]),
+               ('LABEL', [('label', 'rec')]),
+               ('JUMPIFEQ', [('label', 'rec_end'), ('var', 'GF@n'), ('int', '0')]),
+               ('CREATEFRAME', []),
+               ('DEFVAR', [('var', 'TF@x')]),
+               ('MOVE', [('var', 'TF@x'), ('var', 'GF@n')]),
+               ('PUSHFRAME', []),
+               ('SUB', [('var', 'GF@n'), ('var', 'GF@n'), ('int', '1')]),
+               ('CALL', [('label', 'rec')]),
+               ('ADD', [('var', 'GF@s'), ('var', 'GF@s'), ('var', 'LF@x')]),
+               ('POPFRAME', []),
+               ('RETURN', []),
+               ('LABEL', [('label', 'rec_end')]),
+               ('RETURN', [])]
+    return program_xml(program)
+
+
+# dict of functions generating source of each benchmark
+generators = {'arith': arithmetic_loop,
+              'output': output_loop,
+              'recursion': recursion_loop,
+              'strings': string_loop,
+              'stack': stack_loop,
+              'frames': frame_loop,
+              'io': io_loop,
+              'deep': deep_recursion,
+              'unwind': unwinding_recursion,
+              }
+
+# dict of functions generating input of benchmarks which read it (other benchmarks get empty input)
+input_generators = {'io': io_input}
+
+
+# creates xml document from list of instructions (tuples of opcode and list of arguments)
+def program_xml(program):
+    output = '<?xml version="1.0" encoding="UTF-8"?>\n<program language="IPPcode21">\n'
+    for order, (opcode, args) in zip(range(1, len(program) + 1), program):
+        output += '  <instruction order="' + str(order) + '" opcode="' + opcode + '">\n'
+        for arg_no, (arg_type, arg_val) in zip(range(1, len(args) + 1), args):
+            output += '    <arg' + str(arg_no) + ' type="' + arg_type + '">' + arg_val + '</arg' + str(arg_no) + '>\n'
+        output += '  </instruction>\n'
+    return output + '</program>\n'
+
+
+# runs default interpreter with given source and input file once with --profile, returns number of executed
+# instructions of the source program (without tail calls, fused superinstruction counts as the instructions it
+# replaced, so the number does not depend on the interpreter which is measured)
+def count_instructions(source_file, input_file):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as profile_file:
+        pass
+    try:
+        exit_code = subprocess.call([sys.executable, default_interpreter, '--source=' + source_file,
+                                     '--input=' + input_file, '--profile=' + profile_file.name],
+                                    stdout=subprocess.DEVNULL)
+        if exit_code != 0:
+            sys.stderr.write(default_interpreter + ': exited with code ' + str(exit_code) + '\n')
+            sys.exit(1)
+        with open(profile_file.name, 'r') as profile:
+            return json.load(profile)['executed_sources']
+    finally:
+        os.remove(profile_file.name)
+
+
+# returns set of names of options which given interpreter lists in its help (older versions have fewer of them)
+def supported_options(interpreter):
+    help_text = subprocess.run([sys.executable, interpreter, '--help'], stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+    return set(re.findall(r'--([a-z][a-z-]*)', help_text))
+
+
+# returns true if given interpreter options are all supported (given set of supported option names)
+def options_supported(interpreter_options, supported):
+    return all(option[2:].split('=')[0] in supported for option in interpreter_options)
+
+
+# runs interpreter with given source and input file repeatedly, returns best wall time in seconds and peak memory
+# of the interpreter process in kilobytes (max of all runs, as reported by the operating system)
+def measure(interpreter, interpreter_options, source_file, input_file, repeat):
+    best = None
+    peak_memory = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, interpreter, '--source=' + source_file, '--input=' + input_file] +
+                                   interpreter_options, stdout=subprocess.DEVNULL)
+        _, status, usage = os.wait4(process.pid, 0)  # resource usage of this run only
+        elapsed = time.perf_counter() - start
+        exit_code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if exit_code != 0:
+            sys.stderr.write(interpreter + ': exited with code ' + str(exit_code) + '\n')
+            sys.exit(1)
+        if best is None or elapsed < best:
+            best = elapsed
+        peak_memory = max(peak_memory, usage.ru_maxrss)
+    return best, peak_memory
+
+
+# reads results stored by --json, returns dict: (benchmark, interpreter options) -> result
+# (results of the first interpreter are used when the run compared more of them)
+def load_results(file_name):
+    try:
+        with open(file_name, 'r') as results_file:
+            results = json.load(results_file)['results']
+    except (OSError, ValueError, KeyError, TypeError):  # file doesnt exist or is not a result file
+        sys.stderr.write(file_name + ': cannot read benchmark results\n')
+        sys.exit(11)
+    keyed = {}
+    for result in results:
+        keyed.setdefault((result['benchmark'], ' '.join(result['options'])), result)
+    return keyed
+
+
+# compares two stored runs, prints change of every benchmark both runs measured, returns number of regressions
+def compare_results(old_file, new_file, threshold):
+    old_results = load_results(old_file)
+    new_results = load_results(new_file)
+    regressions = 0
+    for key, new in new_results.items():
+        if key not in old_results:
+            continue
+        old = old_results[key]
+        speed_change = (new['instructions_per_second'] / old['instructions_per_second'] - 1) * 100
+        memory_change = (new['peak_memory_kb'] / old['peak_memory_kb'] - 1) * 100
+        regression = speed_change < -threshold or memory_change > threshold
+        regressions += regression
+        label = ' '.join(part for part in key if part)
+        print('  %-40s %+7.1f %% instructions/s  %+7.1f %% peak memory%s' %
+              (label, speed_change, memory_change, '  REGRESSION' if regression else ''))
+    return regressions
+
+
+# ### end of function definitions ### #
+
+
+# ### PROGRAM ARGUMENT PARSING ### #
+if len(sys.argv) == 2 and sys.argv[1] == '--help':
+    display_help()
+    sys.exit(0)
+
+iterations = default_iterations
+repeat = default_repeat
+threshold = default_threshold
+selected = list(benchmarks)
+interpreters = []
+json_file = None
+compare = False
+for argument in sys.argv[1:]:
+    option = re.fullmatch(r'^--(iterations|repeat)=(\d+)$', argument)
+    benchmark_option = re.fullmatch(r'^--benchmark=(\w+)$', argument)
+    threshold_option = re.fullmatch(r'^--threshold=(\d+(?:\.\d*)?)$', argument)
+    if option is not None:
+        if option.group(1) == 'iterations':
+            iterations = int(option.group(2))
+        else:
+            repeat = int(option.group(2))
+    elif benchmark_option is not None:
+        if benchmark_option.group(1) not in benchmarks:
+            sys.exit(10)  # unknown benchmark
+        selected = [benchmark_option.group(1)]
+    elif threshold_option is not None:
+        threshold = float(threshold_option.group(1))
+    elif argument.startswith('--json='):
+        json_file = argument[len('--json='):]
+    elif argument == '--compare':
+        compare = True
+    elif argument.startswith('--'):
+        sys.exit(10)  # unknown option
+    else:
+        interpreters.append(argument)
+
+# ### COMPARISON ### #
+if compare:
+    if len(interpreters) != 2 or json_file is not None:  # compare takes exactly two result files
+        sys.exit(10)
+    print('comparison of ' + interpreters[0] + ' and ' + interpreters[1] + ' (threshold ' + str(threshold) + ' %)')
+    if compare_results(interpreters[0], interpreters[1], threshold):
+        sys.exit(1)
+    sys.exit(0)
+
+if not interpreters:
+    interpreters.append(default_interpreter)
+supported = {interpreter: supported_options(interpreter) for interpreter in interpreters}
+
+# ### BENCHMARK ### #
+results = []
+for name in selected:
+    description, variants = benchmarks[name]
+    source = generators[name](iterations)
+    with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False) as source_file:
+        source_file.write(source)
+    input_file_name = os.devnull
+    if name in input_generators:
+        with tempfile.NamedTemporaryFile('w', suffix='.in', delete=False) as input_file:
+            input_file.write(input_generators[name](iterations))
+        input_file_name = input_file.name
+    try:
+        # the same number of instructions is used for all interpreters, so their instructions/s are comparable
+        executed = count_instructions(source_file.name, input_file_name)
+        print(description + ', ' + str(iterations) + ' iterations, ' + str(executed) + ' instructions')
+        for interpreter in interpreters:
+            for interpreter_options in variants:
+                label = ' '.join([interpreter] + (interpreter_options or ['(no options)']))
+                if not options_supported(interpreter_options, supported[interpreter]):
+                    print('  %-60s skipped, options are not supported' % label)
+                    continue
+                best, peak_memory = measure(interpreter, interpreter_options, source_file.name, input_file_name,
+                                            repeat)
+                print('  %-60s %8.3f s  %12.0f instructions/s  %8d kB' % (label, best, executed / best, peak_memory))
+                results.append({'benchmark': name, 'interpreter': interpreter, 'options': interpreter_options,
+                                'instructions': executed, 'seconds': best,
+                                'instructions_per_second': executed / best, 'peak_memory_kb': peak_memory})
+    finally:
+        os.remove(source_file.name)
+        if input_file_name != os.devnull:
+            os.remove(input_file_name)
+
+if json_file is not None:
+    try:
+        with open(json_file, 'w') as results_file:
+            json.dump({'iterations': iterations, 'repeat': repeat, 'results': results}, results_file, indent=2)
+    except OSError:  # results cannot be written
+        sys.exit(12)
+
+# ### end of file ### #
@@ -1,842 +1,3474 @@
-# ###  file:       inerpret.py  ### #
-# ###  name: ipp project no. 2  ### #
-# ###  author:        xdudaj02  ### #
-# ###  date:          8.4.2021  ### #
-# ###  version:            1.0  ### #
-
-import xml.etree.ElementTree as Et
-import sys
-import re
-
-# NOT SUPPORTED:
-# unordered instruction arguments
-# filenames containing whitespace
-
-# ### GLOBAL VARIABLES ### #
-# dict with valid opcodes and strings containing mandatory arguments
-# argument representation: V: variable, S: symbol (constant or variable), L: label, T: type
-opcodes = {'MOVE': 'VS',
-           'CREATEFRAME': '',
-           'PUSHFRAME': '',
-           'POPFRAME': '',
-           'DEFVAR': 'V',
-           'CALL': 'L',
-           'RETURN': '',
-           'PUSHS': 'S',
-           'POPS': 'V',
-           'ADD': 'VSS',
-           'SUB': 'VSS',
-           'MUL': 'VSS',
-           'IDIV': 'VSS',
-           'LT': 'VSS',
-           'GT': 'VSS',
-           'EQ': 'VSS',
-           'AND': 'VSS',
-           'OR': 'VSS',
-           'NOT': 'VS',
-           'INT2CHAR': 'VS',
-           'STRI2INT': 'VSS',
-           'READ': 'VT',
-           'WRITE': 'S',
-           'CONCAT': 'VSS',
-           'STRLEN': 'VS',
-           'GETCHAR': 'VSS',
-           'SETCHAR': 'VSS',
-           'TYPE': 'VS',
-           'LABEL': 'L',
-           'JUMP': 'L',
-           'JUMPIFEQ': 'LSS',
-           'JUMPIFNEQ': 'LSS',
-           'EXIT': 'S',
-           'DPRINT': 'S',
-           'BREAK': '',
-           }
-
-types = ['int', 'bool', 'string', 'nil', 'label', 'type', 'var']  # list of valid types
-
-# dict containing valid types for each argument type
-type_validity = {'V': ['var'], 'S': ['var', 'int', 'bool', 'string', 'nil'], 'L': ['label'], 'T': ['type']}
-
-# dict used for converting ipp representation of bool values to python representation, repeated application is kosher
-bool_map = {'true': True, 'false': False, True: True, False: False}
-
-# regex used for finding escaped characters (with decimal codes)
-regex_dec_escapes = re.compile(r"\\(\d{3})")
-
-
-# CLASS DEFINITIONS
-# class containing all frames used by ipp programs
-class FrameStack:
-    def __init__(self):
-        self.lf_frame_arr = []  # local frames stack
-        self.lf_frame_arr.append(None)  # first element is None by default
-        self.lf_frames_in = 0  # local frames stack size
-        self.lf = None  # local frame (uninitialized by default)
-        self.tf = None  # temporary frame (uninitialized by default)
-        self.gf = Frame()  # global frame
-
-    def __repr__(self):
-        return 'GF:' + str(self.gf) + ', LF:' + str(self.lf) + ', TF:' + str(self.tf) + '\n' + str(self.lf_frame_arr)
-
-    # pushes tf into lf stack
-    def lf_push(self):
-        if self.tf is None:
-            sys.exit(55)
-        self.lf_frame_arr.append(self.tf)
-        self.lf_frames_in += 1
-        self.lf = self.tf
-        self.tf = None
-
-    # pops top frame from lf stack into tf
-    def lf_pop(self):
-        if self.lf_frames_in < 1:
-            sys.exit(55)
-        self.lf_frames_in -= 1
-        self.tf = self.lf_frame_arr.pop()
-        self.lf = self.lf_frame_arr[-1]
-
-    # defines variable with given name in given frame
-    def ipp_defvar(self, var_string):
-        var_frame, var_name = var_string.split('@')
-        if var_frame == 'GF':
-            var_def_check(self.gf, var_name)
-            self.gf.vars[var_name] = Variable()
-        elif var_frame == 'TF':
-            frame_check(self.tf)
-            var_def_check(self.tf, var_name)
-            self.tf.vars[var_name] = Variable()
-        elif var_frame == 'LF':
-            frame_check(self.lf)
-            var_def_check(self.lf, var_name)
-            self.lf.vars[var_name] = Variable()
-
-    # assigns value and type to variable with given name in given frame
-    def ipp_move(self, var_string, value, value_type):
-        var_frame, var_name = var_string.split('@')
-        if value_type == 'int':
-            value = int(value)
-        if value_type == 'bool':
-            value = bool_map[value]
-        if var_frame == 'GF':
-            var_assign_check(self.gf, var_name)
-            self.gf.vars[var_name].set(value, value_type)
-        elif var_frame == 'TF':
-            frame_check(self.tf)
-            var_assign_check(self.tf, var_name)
-            self.tf.vars[var_name].set(value, value_type)
-        elif var_frame == 'LF':
-            frame_check(self.lf)
-            var_assign_check(self.lf, var_name)
-            self.lf.vars[var_name].set(value, value_type)
-
-    # returns type of given variable in given frame
-    def get_var_type(self, var_string):
-        var_frame, var_name = var_string.split('@')
-        if var_frame == 'GF':
-            var_assign_check(self.gf, var_name)
-            return self.gf.vars[var_name].type
-        if var_frame == 'TF':
-            frame_check(self.tf)
-            var_assign_check(self.tf, var_name)
-            return self.tf.vars[var_name].type
-        if var_frame == 'LF':
-            frame_check(self.lf)
-            var_assign_check(self.lf, var_name)
-            return self.lf.vars[var_name].type
-
-    # returns Variable object of given variable in given frame
-    def get_var(self, var_string):
-        var_frame, var_name = var_string.split('@')
-        if var_frame == 'GF':
-            var_assign_check(self.gf, var_name)
-            return self.gf.vars[var_name]
-        if var_frame == 'TF':
-            frame_check(self.tf)
-            var_assign_check(self.tf, var_name)
-            return self.tf.vars[var_name]
-        if var_frame == 'LF':
-            frame_check(self.lf)
-            var_assign_check(self.lf, var_name)
-            return self.lf.vars[var_name]
-
-
-# class represents frame
-class Frame:
-    def __init__(self):
-        self.vars = {}
-
-    def __repr__(self):
-        return str(self.vars)
-
-    def __contains__(self, frame_item):
-        return frame_item in self.vars
-
-
-# class represents variable
-class Variable:
-    def __init__(self, var_value=None, var_type=''):
-        self.value = var_value
-        self.type = var_type
-
-    def __repr__(self):
-        return str(self.value) + ' - ' + self.type
-
-    # sets the value and type of a variable to given values
-    def set(self, var_value, var_type):
-        self.value = var_value
-        self.type = var_type
-
-
-# class represents ipp stack
-class Stack:
-    def __init__(self):
-        self.arr = []
-
-    def __repr__(self):
-        return 'stack: ' + str(self.arr)
-
-    # pushes a new Variable object onto the ipp stack with given value and type
-    def ipp_pushs(self, var_value, var_type):
-        self.arr.append(Variable(var_value, var_type))
-
-    # pops value and type from ipp stack into given variable
-    def ipp_pops(self, var_string):
-        if len(self.arr) == 0:
-            sys.exit(56)
-        var = self.arr.pop()
-        frames.ipp_move(var_string, var.value, var.type)
-
-
-# class represents instruction register
-class InstructionRegister:
-    def __init__(self):
-        self.label_dict = {}  # dict of labels in the code
-        self.return_address_arr = []  # stack for return addresses (when using jump instruction)
-        self.curr_i = 1  # stores number of current instruction
-
-    def __repr__(self):
-        return 'labels: ' + str(self.label_dict) + '\nret_addresses:' + str(self.return_address_arr)
-
-    # adds a new label
-    def ipp_label(self, label_name):
-        self.label_def_check(label_name)
-        self.label_dict[label_name] = self.curr_i
-
-    # performs jump
-    def ipp_jump(self, label):
-        self.label_use_check(label)
-        self.curr_i = self.label_dict[label]
-
-    # performs jump and saves return address
-    def ipp_call(self, label):
-        self.label_use_check(label)
-        self.return_address_arr.append(self.curr_i)
-        self.curr_i = self.label_dict[label]
-
-    # performs return
-    def ipp_return(self):
-        if len(self.return_address_arr) == 0:
-            sys.exit(56)
-        self.curr_i = self.return_address_arr.pop()
-
-    # detects repeated label definition
-    def label_def_check(self, label_name):
-        if label_name in self.label_dict:
-            sys.exit(52)
-
-    # detects usage of a non existent label
-    def label_use_check(self, label_name):
-        if label_name not in self.label_dict:
-            sys.exit(52)
-
-
-# classes used for xml document representation
-# class represents one instruction argument
-class Argument:
-    def __init__(self, arg_type, arg_val):
-        # empty strings conversion (they are returned as none from xml document)
-        if arg_type == 'string' and arg_val is None:
-            arg_val = ''
-        self.type = arg_type  # argument type
-        self.val = arg_val  # argument value
-
-    def __repr__(self):
-        return self.type + ' ' + str(self.val)
-
-
-# class represents one instruction
-class Instruction:
-    def __init__(self, name):
-        self.opcode = name  # instruction name
-        self.arg_num = 1  # no of argument (default is 1)
-        self.args = {}  # dict of arguments of instruction
-
-    # adds new instruciton argument
-    def add_arg(self, arg_type, arg_val):
-        self.args[self.arg_num] = Argument(arg_type, arg_val)
-        self.arg_num += 1
-
-    # returns argument with given number
-    def arg(self, arg_num):
-        return self.args[arg_num]
-
-    def __add__(self, other):
-        return self.opcode + other
-
-    def __eq__(self, other):
-        return self.opcode == other
-
-    def __repr__(self):
-        return self.opcode
-
-
-# class represents the whole xml program
-class InstructionArray:
-    def __init__(self, xml_tree):
-        self.root = {}  # root = program element
-        self.inst_num = 1  # order of the instruction
-        for xml_inst in xml_tree:  # loop over every instruction
-            # add new Instruction object to the root dict of instructions
-            self.root[self.inst_num] = Instruction(xml_inst.attrib['opcode'])
-            for xml_arg in xml_inst:  # loop over every argument
-                # add new argument to the argument dict of a instruction
-                self.root[self.inst_num].add_arg(xml_arg.attrib['type'], xml_arg.text)
-            self.inst_num += 1
-
-    def __repr__(self):
-        output = ''
-        for key, value in self.root.items():
-            output += str(key) + '. ' + str(value) + '\n'
-            for a_key, a_value in value.args.items():
-                output += '  - arg' + str(a_key) + ' ' + str(a_value.val) + ' (' + a_value.type + ')\n'
-        return output
-
-    def __getitem__(self, ia_item):
-        return self.root[ia_item]
-
-
-# ### end of class definitions ### #
-
-
-# ### FUNCTIONS ### #
-# displays program usage help
-def display_help():
-    print('''interpret.py  |  version 1.0  |  xdudaj02
-interpreter for IPPcode21
-
-USAGE:
-  python3.8 interpret.py --source=source_file --input=input_file >output      classic IPPcode21 interpretation
-  python3.8 interpret.py --source=source_file <input_file >output             classic IPPcode21 interpretation
-  python3.8 interpret.py --input=input_file <source_file >output              classic IPPcode21 interpretation
-  python3.8 interpret.py --help                                               display help
-
-ARGUMENTS:  
-  source_file         file containing source code written in IPPcode21
-  input_file          file containing input for IPPcode21 interpreter
-    -at least one of source_file and input_file must be provided through command line argument,
-    -other one is expected on stdin
-          ''')
-
-
-# checks argument type validity
-def check_argument_type(actual, expected):
-    return actual in type_validity[expected]
-
-
-# checks whether given value is of the given type
-def check_type_validity(actual_type, actual_value):
-    if actual_type == 'nil':
-        return actual_value == 'nil'
-    if actual_type == 'bool':
-        return re.fullmatch(r'^(?:true|false)$', actual_value)
-    if actual_type == 'int':
-        return re.fullmatch(r'^(?:[+\-]?[1-9]\d*|0)$', actual_value)
-    if actual_type == 'string':
-        return re.fullmatch(r'^(?:[^\s#\\]|\\\d{3})*$', empty_string_map(actual_value))
-    if actual_type == 'type':
-        return re.fullmatch(r'^(?:int|bool|string|nil)$', actual_value)
-    if actual_type == 'label':
-        return re.fullmatch(r'^[a-zA-Z_\-$&%*!?][0-9a-zA-Z_\-$&%*!?]*$', actual_value)
-    if actual_type == 'var':
-        return re.fullmatch(r'^[GLT]F@[a-zA-Z_\-$&%*!?][0-9a-zA-Z_\-$&%*!?]*$', actual_value)
-    return True
-
-
-# corrects empty string wrongly represented as None
-def empty_string_map(string):
-    if string is None:
-        return ''
-    else:
-        return string
-
-
-# calculates and returns a character from its decimal escaped representation
-def replace_dec_escapes(match):
-    return chr(int(match.group(1)))
-
-
-# checks whether frame is defined
-def frame_check(frame):
-    if frame is None:
-        sys.exit(55)
-
-
-# detects repeated definition of a variable
-def var_def_check(frame, var_name):
-    if var_name in frame:
-        sys.exit(52)
-
-
-# detects usage of an undefined variable
-def var_assign_check(frame, var_name):
-    if var_name not in frame:
-        sys.exit(54)
-
-
-# retrieves value and type if given symbol is a variable else returns value and type of given symbol
-def safe_get_symb(symb_arg):
-    if symb_arg.type == 'var':
-        symb_var = frames.get_var(symb_arg.val)
-        symb_result = symb_var.value, symb_var.type
-    else:
-        if symb_arg.type == 'int':
-            return int(symb_arg.val), symb_arg.type
-        if symb_arg.type == 'bool':
-            return bool_map[symb_arg.val], symb_arg.type
-        symb_result = symb_arg.val, symb_arg.type
-    if symb_result[0] is None:
-        sys.exit(56)
-    return symb_result
-
-
-# ### end of function definitions ### #
-
-
-# ### PROGRAM ARGUMENT PARSING ### #
-if 2 > len(sys.argv) > 3:
-    sys.exit(10)  # wrong number of arguments supplied
-if len(sys.argv) == 2 and sys.argv[1] == '--help':
-    display_help()  # display help
-    sys.exit(0)
-
-source_from_stdin = False  # true if source file not supplied
-input_from_stdin = False  # true if input file not supplied
-if len(sys.argv) == 2:  # only one file supplied
-    argument = re.fullmatch(r'^--(source|input)=([^\s]*)$', sys.argv[1])
-    if argument is None:  # wrong argument
-        sys.exit(10)
-    if argument.group(1) == 'source':  # source from file
-        pr_source = argument.group(2)
-        pr_input = sys.stdin.read()
-        input_from_stdin = True  # input from stdin
-    else:
-        pr_input = argument.group(2)  # input from file
-        pr_source = sys.stdin.read()
-        source_from_stdin = True  # source from stdin
-else:  # both files supplied
-    argument = re.fullmatch(r'^--(source|input)=([^\s]*)$', sys.argv[1])
-    if argument is None:  # wrong argument
-        sys.exit(10)
-    if argument.group(1) == 'source':  # first file is source
-        pr_source = argument.group(2)
-        pr_input_gr = re.fullmatch(r'^--input=([^\s]*)$', sys.argv[2])
-        if pr_input_gr is None:  # wrong second argument
-            sys.exit(10)
-        pr_input = pr_input_gr.group(1)
-    else:  # first file is input
-        pr_input = argument.group(2)
-        pr_source_gr = re.fullmatch(r'^--source=([^\s]*)$', sys.argv[2])
-        if pr_source_gr is None:
-            sys.exit(10)  # wrong second argument
-        pr_source = pr_source_gr.group(1)
-
-# opening files
-if not input_from_stdin:
-    try:
-        input_text = open(pr_input, 'r').read().splitlines()  # save input from a file into a list
-    except FileNotFoundError:  # file doesnt exist
-        sys.exit(11)
-else:
-    input_text = pr_input.splitlines()  # save input from stdin into a list
-if len(input_text) > 0 and input_text[-1] == '':  # trim extra item in input list
-    input_text.pop()
-
-if not source_from_stdin:
-    try:
-        pr_source = open(pr_source, 'r').read()  # open and read source code into a variable
-    except FileNotFoundError:  # file doesnt exist
-        sys.exit(11)
-
-input_text = [regex_dec_escapes.sub(replace_dec_escapes, i) for i in input_text]
-
-# PARSING XML SOURCE DOCUMENT
-# checking validity of xml source document
-try:
-    root = Et.fromstring(pr_source)  # open source from string
-except Et.ParseError:
-    sys.exit(31)  # xml document not well-formed (syntax errors)
-
-# checking validity of structure of xml source document (ipp validity)
-# checking validity of root element
-if root.tag != 'program':  # root element name = program
-    sys.exit(32)
-if len(root.attrib) > 3:  # max 3 attributes in program element
-    sys.exit(32)
-for item in root.attrib:  # allowed attribute names
-    if item not in ['language', 'name', 'description']:
-        sys.exit(32)
-if 'language' not in root.attrib.keys():  # mandatory attribute
-    sys.exit(32)
-if root.attrib['language'] != 'IPPcode21':  # mandatory language attribute value
-    sys.exit(32)
-
-# checking validity of instruction elements
-order_arr = []  # array of order numbers that already occurred
-for i, instr in zip(range(len(root)), root):  # loop over all instructions
-    if instr.tag != 'instruction':  # mandatory instruction element name
-        sys.exit(32)
-    if len(instr.attrib) != 2:  # two mandatory attributes
-        sys.exit(32)
-    if 'order' not in instr.attrib.keys() or 'opcode' not in instr.attrib.keys():  # names of mandatory attributes
-        sys.exit(32)
-    try:
-        order = int(instr.attrib['order'])  # order must be integer
-    except ValueError:
-        sys.exit(32)
-    if order <= 0:
-        sys.exit(32)  # order value restrictions
-    if order in order_arr:  # orders must not repeat
-        sys.exit(32)
-    order_arr.append(order)
-    if instr.attrib['opcode'] not in opcodes:  # opcode must be valid
-        sys.exit(32)
-    arg_types = opcodes[instr.attrib['opcode']]  # expected types of arguments
-    if len(instr) != len(arg_types):  # expected number of arguments for an instruction
-        sys.exit(32)
-
-    # checking validity of argument elements
-    for j, arg in zip(range(len(instr)), instr):
-        arg_gr = re.fullmatch(r'^arg(\d+)$', arg.tag)  # mandatory argument name format
-        if arg_gr is None:
-            sys.exit(32)
-        arg_no = int(arg_gr.group(1))
-        if arg_no != (j + 1):  # argument number validity, must be in correct order, no missing numbers
-            sys.exit(32)
-        if len(arg.attrib) != 1:  # mandatory number of attributes (1)
-            sys.exit(32)
-        if 'type' not in arg.attrib.keys():  # mandatory attribute type
-            sys.exit(32)
-        if arg.attrib['type'] not in types:  # type must be valid
-            sys.exit(32)
-        # checking if supplied argument is expected for given instruction
-        if not check_argument_type(arg.attrib['type'], arg_types[arg_no - 1]):
-            sys.exit(53)
-        if not check_type_validity(arg.attrib['type'], arg.text):  # checking if value is of given type
-            sys.exit(32)
-
-# ### end of xml document validity checks ### #
-
-# ### INTERPRETATION OF SOURCE CODE ### #
-pr_source = regex_dec_escapes.sub(replace_dec_escapes, pr_source)  # sub decimal escapes for actual characters
-root = Et.fromstring(pr_source)  # open source from string again (is definitely correct)
-root = sorted(root, key=lambda x: int(x.attrib['order']))  # sort instructions
-ia = InstructionArray(root)  # creating program representation for easier usage
-frames = FrameStack()  # new FrameStack object (all frames)
-ir = InstructionRegister()  # new InstructionRegister object (instruction counter, labels, return addresses)
-stack = Stack()  # new Stack object (program stack - pushs or pops instructions)
-
-# prerun, saves all label names with their addresses (instruction numbers)
-while True:
-    if ir.curr_i > len(root):
-        break
-    curr_opcode = ia[ir.curr_i]  # current instruction
-
-    # LABEL label
-    if curr_opcode == 'LABEL':
-        ir.ipp_label(curr_opcode.arg(1).val)
-
-    ir.curr_i += 1  # increment instruction counter
-
-ir.curr_i = 1  # reset instruction counter
-exit_code = 0  # set default exit code
-
-# main run, interprets the source code
-while True:
-    if ir.curr_i > len(root):
-        break
-    curr_opcode = ia[ir.curr_i]  # current instruction
-
-    # CREATEFRAME
-    if curr_opcode == 'CREATEFRAME':
-        frames.tf = Frame()
-
-    # PUSHFRAME
-    elif curr_opcode == 'PUSHFRAME':
-        frames.lf_push()
-
-    # POPFRAME
-    elif curr_opcode == 'POPFRAME':
-        frames.lf_pop()
-
-    # DEFVAR var
-    elif curr_opcode == 'DEFVAR':
-        frames.ipp_defvar(curr_opcode.arg(1).val)
-
-    # MOVE var symb
-    elif curr_opcode == 'MOVE':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value, var1_type)
-
-    # PUSHS symb
-    elif curr_opcode == 'PUSHS':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(1))
-        stack.ipp_pushs(var1_value, var1_type)
-
-    # POPS var
-    elif curr_opcode == 'POPS':
-        stack.ipp_pops(curr_opcode.arg(1).val)
-
-    # ADD var symb symb
-    elif curr_opcode == 'ADD':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'int' or var2_type != 'int':  # operands must be int
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value + var2_value, 'int')
-
-    # SUB var symb symb
-    elif curr_opcode == 'SUB':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'int' or var2_type != 'int':  # operands must be int
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value - var2_value, 'int')
-
-    # MUL var symb symb
-    elif curr_opcode == 'MUL':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'int' or var2_type != 'int':  # operands must be int
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value * var2_value, 'int')
-
-    # IDIV var symb symb
-    elif curr_opcode == 'IDIV':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'int' or var2_type != 'int':  # operands must be int
-            sys.exit(53)
-        if var2_value == 0:  # division by zero not allowed
-            sys.exit(57)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value // var2_value, 'int')
-
-    # LT var symb symb
-    elif curr_opcode == 'LT':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != var2_type:  # operand types must be the same
-            sys.exit(53)
-        if var1_type == 'nil' or var2_type == 'nil':
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value < var2_value, 'bool')
-
-    # GT var symb symb
-    elif curr_opcode == 'GT':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != var2_type:  # operand types must be the same
-            sys.exit(53)
-        if var1_type == 'nil' or var2_type == 'nil':
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value > var2_value, 'bool')
-
-    # EQ var symb symb
-    elif curr_opcode == 'EQ':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != var2_type:  # operand types must be the same
-            if var1_type != 'nil' and var2_type != 'nil':
-                sys.exit(53)
-            else:  # operands types may be different if one is nil
-                result = False  # always not equal
-        else:
-            result = (var1_value == var2_value)
-        frames.ipp_move(curr_opcode.arg(1).val, result, 'bool')
-
-    # AND var symb symb
-    elif curr_opcode == 'AND':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'bool' or var2_type != 'bool':  # operands must be bool
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value and var2_value, 'bool')
-
-    # OR var symb symb
-    elif curr_opcode == 'OR':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'bool' or var2_type != 'bool':  # operands must be bool
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value or var2_value, 'bool')
-
-    # NOT var symb
-    elif curr_opcode == 'NOT':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        if var1_type != 'bool':  # operand must be bool
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, not var1_value, 'bool')
-
-    # INT2CHAR var symb
-    elif curr_opcode == 'INT2CHAR':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        if var1_type != 'int':  # operand must be int
-            sys.exit(53)
-        try:
-            result = chr(var1_value)
-        except ValueError:  # negative int is invalid
-            sys.exit(58)
-        frames.ipp_move(curr_opcode.arg(1).val, result, 'string')
-
-    # STR2INT var symb symb
-    elif curr_opcode == 'STRI2INT':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'string' or var2_type != 'int':  # operands must be string and int
-            sys.exit(53)
-        if var2_value < 0 or var2_value >= len(var1_value):  # index must not be out of bounds
-            sys.exit(58)
-        frames.ipp_move(curr_opcode.arg(1).val, ord(var1_value[var2_value]), 'int')
-
-    # CONCAT var symb symb
-    elif curr_opcode == 'CONCAT':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'string' or var2_type != 'string':  # operands must be string
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value + var2_value, 'string')
-
-    # STRLEN var symb
-    elif curr_opcode == 'STRLEN':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        if var1_type != 'string':  # operand must be string
-            sys.exit(53)
-        frames.ipp_move(curr_opcode.arg(1).val, len(var1_value), 'int')
-
-    # GETCHAR var symb symb
-    elif curr_opcode == 'GETCHAR':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != 'string' or var2_type != 'int':  # operands must be string and int
-            sys.exit(53)
-        if var2_value < 0 or var2_value >= len(var1_value):  # index must not be out of bounds
-            sys.exit(58)
-        frames.ipp_move(curr_opcode.arg(1).val, var1_value[var2_value], 'string')
-
-    # SETCHAR var symb symb
-    elif curr_opcode == 'SETCHAR':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        dest_value, dest_type = safe_get_symb(curr_opcode.arg(1))
-        # operands must be string, int and string
-        if var1_type != 'int' or var2_type != 'string' or dest_type != 'string':
-            sys.exit(53)
-        # index must not be out of bounds, source must not be empty
-        if var1_value < 0 or var1_value >= len(dest_value) or len(var2_value) == 0:
-            sys.exit(58)
-        # set value of char in dest at given index to first char in source
-        result = dest_value[:var1_value] + var2_value[0] + dest_value[(var1_value + 1):]
-        frames.ipp_move(curr_opcode.arg(1).val, result, 'string')
-
-    # READ var type
-    elif curr_opcode == 'READ':
-        read_type = curr_opcode.arg(2).val
-        try:
-            read_value = input_text.pop(0)
-        except IndexError:  # no input, reads nil
-            read_value = read_type = 'nil'
-        else:
-            if curr_opcode.arg(2).val == 'int':
-                try:
-                    read_value = int(read_value)  # read int value
-                except ValueError:  # invalid int value, reads nil
-                    read_value = read_type = 'nil'
-            elif curr_opcode.arg(2).val == 'bool':
-                read_value = (read_value.lower() == 'true')  # bool is True if value is 'true' else False
-        frames.ipp_move(curr_opcode.arg(1).val, read_value, read_type)
-
-    # WRITE symb
-    elif curr_opcode == 'WRITE':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(1))
-        if var1_type == 'int':  # convert int to str
-            result = str(var1_value)
-        elif var1_type == 'bool':  # correctly convert bool value to ipp representation of bool
-            if var1_value:
-                result = 'true'
-            else:
-                result = 'false'
-        elif var1_type == 'nil':  # convert nil to its ipp representation
-            result = ''
-        else:
-            result = var1_value
-        print(result, end='')  # print without default newlines
-
-    # TYPE var symb
-    elif curr_opcode == 'TYPE':
-        if curr_opcode.arg(2).type == 'var':
-            dyn_type = frames.get_var_type(curr_opcode.arg(2).val)
-        else:
-            dyn_type = curr_opcode.arg(2).type
-        frames.ipp_move(curr_opcode.arg(1).val, dyn_type, 'string')
-
-    # JUMP label
-    elif curr_opcode == 'JUMP':
-        ir.ipp_jump(curr_opcode.arg(1).val)
-
-    # JUMPIFEQ label symb symb
-    elif curr_opcode == 'JUMPIFEQ':
-        ir.label_use_check(curr_opcode.arg(1).val)  # check label existence
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != var2_type:  # operands types must be the same
-            if var1_type != 'nil' and var2_type != 'nil':  # except when one is nil
-                sys.exit(53)
-        elif var1_value == var2_value:  # jump if values are equal
-            ir.ipp_jump(curr_opcode.arg(1).val)
-
-    # JUMPIFNEQ label symb symb
-    elif curr_opcode == 'JUMPIFNEQ':
-        ir.label_use_check(curr_opcode.arg(1).val)  # check label existence
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(2))
-        var2_value, var2_type = safe_get_symb(curr_opcode.arg(3))
-        if var1_type != var2_type:  # operands types must be the same
-            if var1_type != 'nil' and var2_type != 'nil':  # except when one is nil
-                sys.exit(53)
-            else:
-                ir.ipp_jump(curr_opcode.arg(1).val)  # not equal operand types -> jump
-        else:
-            if var1_value != var2_value:  # jump if values are not equal
-                ir.ipp_jump(curr_opcode.arg(1).val)
-
-    # CALL label
-    elif curr_opcode == 'CALL':
-        ir.ipp_call(curr_opcode.arg(1).val)
-
-    # RETURN
-    elif curr_opcode == 'RETURN':
-        ir.ipp_return()
-
-    # EXIT symb
-    elif curr_opcode == 'EXIT':
-        var1_value, var1_type = safe_get_symb(curr_opcode.arg(1))
-        if var1_type != 'int':
-            sys.exit(53)
-        if var1_value < 0 or var1_value > 49:  # exit code must be in this range
-            sys.exit(57)
-        exit_code = var1_value
-        break
-
-    ir.curr_i += 1  # increment instruction no
-
-sys.exit(exit_code)  # exit with exit code
-
-# ### end of file ### #
+# ###  file:       inerpret.py  ### #
+# ###  name: ipp project no. 2  ### #
+# ###  author:        xdudaj02  ### #
+# ###  date:          8.4.2021  ### #
+# ###  version:            1.0  ### #
+
+import xml.etree.ElementTree as Et
+from collections import deque
+import sys
+import re
+import gc
+import json
+import time
+import struct
+import hashlib
+import os
+import io
+import bisect
+
+# NOT SUPPORTED:
+# unordered instruction arguments
+# filenames containing whitespace
+
+# ### GLOBAL VARIABLES ### #
+# dict with valid opcodes and strings containing mandatory arguments
+# argument representation: V: variable, S: symbol (constant or variable), L: label, T: type
+opcodes = {'MOVE': 'VS',
+           'CREATEFRAME': '',
+           'PUSHFRAME': '',
+           'POPFRAME': '',
+           'DEFVAR': 'V',
+           'CALL': 'L',
+           'RETURN': '',
+           'PUSHS': 'S',
+           'POPS': 'V',
+           'ADD': 'VSS',
+           'SUB': 'VSS',
+           'MUL': 'VSS',
+           'IDIV': 'VSS',
+           'LT': 'VSS',
+           'GT': 'VSS',
+           'EQ': 'VSS',
+           'AND': 'VSS',
+           'OR': 'VSS',
+           'NOT': 'VS',
+           'INT2CHAR': 'VS',
+           'STRI2INT': 'VSS',
+           'READ': 'VT',
+           'WRITE': 'S',
+           'CONCAT': 'VSS',
+           'STRLEN': 'VS',
+           'GETCHAR': 'VSS',
+           'SETCHAR': 'VSS',
+           'TYPE': 'VS',
+           'LABEL': 'L',
+           'JUMP': 'L',
+           'JUMPIFEQ': 'LSS',
+           'JUMPIFNEQ': 'LSS',
+           'EXIT': 'S',
+           'DPRINT': 'S',
+           'BREAK': '',
+           }
+
+# internal opcodes created by optimizer and by fusing instructions (not valid in source code),
+# arguments are the same as in opcodes dict, DEFVARMOVE: DEFVAR var + MOVE var symb, CHECKVAR: MOVE var var,
+# superinstructions (compare or arithmetic + conditional jump testing the result): LT/GT/EQ var symb symb +
+# JUMPIFEQ/JUMPIFNEQ label var bool, ADD/SUB var symb symb + JUMPIFEQ/JUMPIFNEQ label var symb,
+# FAST variants are used by type inference where operand types and destination are proven (no runtime checks)
+internal_opcodes = {'DEFVARMOVE': 'VS',
+                    'CHECKVAR': 'V',
+                    'LTJUMP': 'VSSL',
+                    'GTJUMP': 'VSSL',
+                    'EQJUMP': 'VSSL',
+                    'ADDJUMP': 'VSSLS',
+                    'SUBJUMP': 'VSSLS',
+                    'FASTADD': 'VSS',
+                    'FASTSUB': 'VSS',
+                    'FASTMUL': 'VSS',
+                    'FASTLT': 'VSS',
+                    'FASTGT': 'VSS',
+                    'FASTEQ': 'VSS',
+                    'FASTCONCAT': 'VSS',
+                    'FASTJUMPIFEQ': 'LSS',
+                    'FASTJUMPIFNEQ': 'LSS',
+                    'FASTLTJUMP': 'VSSL',
+                    'FASTGTJUMP': 'VSSL',
+                    'FASTEQJUMP': 'VSSL',
+                    'FASTADDJUMP': 'VSSLS',
+                    'FASTSUBJUMP': 'VSSLS',
+                    'TAILCALL': 'L',
+                    }
+
+# dict mapping opcodes to integer ids used by dispatch table (ids follow order of opcodes and internal opcodes)
+opcode_ids = {opcode: opcode_id for opcode_id, opcode in enumerate(list(opcodes) + list(internal_opcodes))}
+opcode_names = list(opcode_ids)  # list of opcodes indexed by their integer id
+
+types = ['int', 'bool', 'string', 'nil', 'label', 'type', 'var']  # list of valid types
+
+# dict containing valid types for each argument type
+type_validity = {'V': ['var'], 'S': ['var', 'int', 'bool', 'string', 'nil'], 'L': ['label'], 'T': ['type']}
+
+# dict used for converting ipp representation of bool values to python representation, repeated application is kosher
+bool_map = {'true': True, 'false': False, True: True, False: False}
+
+# regex used for finding escaped characters (with decimal codes)
+regex_dec_escapes = re.compile(r"\\(\d{3})")
+
+# dict of precompiled regexes used for checking validity of argument values of given type
+value_regexes = {'bool': re.compile(r'^(?:true|false)$'),
+                 'int': re.compile(r'^(?:[+\-]?[1-9]\d*|0)$'),
+                 'string': re.compile(r'^(?:[^\s#\\]|\\\d{3})*$'),
+                 'type': re.compile(r'^(?:int|bool|string|nil)$'),
+                 'label': re.compile(r'^[a-zA-Z_\-$&%*!?][0-9a-zA-Z_\-$&%*!?]*$'),
+                 'var': re.compile(r'^[GLT]F@[a-zA-Z_\-$&%*!?][0-9a-zA-Z_\-$&%*!?]*$'),
+                 }
+
+# regex used for checking argument element names
+regex_arg_tag = re.compile(r'^arg(\d+)$')
+
+# dict of valid program options with regexes of their values (None if option has no value)
+program_options = {'help': None,
+                   'source': r'[^\s]*',
+                   'input': r'[^\s]*',
+                   'output-buffer': r'\d+',
+                   'profile': r'[^\s]+',
+                   'optimize': None,
+                   'checkpoint': r'[^\s]+',
+                   'checkpoint-interval': r'[1-9]\d*',
+                   'resume': r'[^\s]+',
+                   'cache': r'[^\s]+',
+                   'batch': r'[^\s]+',
+                   'batch-output': r'[^\s]+',
+                   'jobs': r'[1-9]\d*',
+                   'max-steps': r'[1-9]\d*',
+                   'max-time': r'(?:\d+(?:\.\d*)?|\.\d+)',
+                   'jit': None,
+                   'max-stack': r'[1-9]\d*',
+                   'trace': r'[^\s]+',
+                   'break': r'[^\s,]+(?:,[^\s,]+)*',
+                   'max-memory': r'[1-9]\d*[KMG]?',
+                   'memory-stats': r'[1-9]\d*',
+                   'emit-binary': r'[^\s]+',
+                   }
+
+# default size of output buffer (in characters)
+default_output_buffer_size = 65536
+
+# default number of executed instructions between two checkpoints
+default_checkpoint_interval = 1000000
+
+# number of executed instructions between two checks of time limit
+limit_check_interval = 1000
+
+# multipliers of units of --max-memory value (bytes, kibibytes, mebibytes, gibibytes)
+memory_units = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+# max number of discarded temporary frames kept for reuse by CREATEFRAME
+frame_pool_size = 64
+
+# number of preallocated slots of ipp stack (stack grows when it is full)
+default_stack_capacity = 1024
+
+# max number of instructions compiled into one python function by block compiler (longer blocks are split)
+jit_block_size = 100
+
+# FAST instructions generated inline by block compiler: opcode -> (python operator, type of result or None for jumps)
+jit_operators = {'FASTADD': ('+', 'int'),
+                 'FASTSUB': ('-', 'int'),
+                 'FASTMUL': ('*', 'int'),
+                 'FASTLT': ('<', 'bool'),
+                 'FASTGT': ('>', 'bool'),
+                 'FASTEQ': ('==', 'bool'),
+                 'FASTLTJUMP': ('<', 'bool'),
+                 'FASTGTJUMP': ('>', 'bool'),
+                 'FASTEQJUMP': ('==', 'bool'),
+                 'FASTADDJUMP': ('+', 'int'),
+                 'FASTSUBJUMP': ('-', 'int'),
+                 'FASTJUMPIFEQ': ('==', None),
+                 'FASTJUMPIFNEQ': ('!=', None),
+                 }
+
+# frame identifiers used by pre-decoded variable arguments
+GF = 0
+LF = 1
+TF = 2
+frame_ids = {'GF': GF, 'LF': LF, 'TF': TF}
+
+# interpreter and output directory of batch runs (set by run_batch, inherited by forked workers)
+batch_interpreter = None
+batch_output_dir = None
+
+
+# CLASS DEFINITIONS
+# exception raised instead of exiting the process, code is exit code of interpretation (error or invalid options)
+class InterpretExit(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+# exception raised by EXIT instruction, code is exit code given by the program
+class ProgramExit(InterpretExit):
+    pass
+
+
+# class containing all frames used by ipp programs
+class FrameStack:
+    def __init__(self, gf_size, lf_size):
+        self.lf_frame_arr = []  # local frames stack
+        self.lf_frame_arr.append(None)  # first element is None by default
+        self.lf_frames_in = 0  # local frames stack size
+        self.lf = None  # local frame (uninitialized by default)
+        self.tf = None  # temporary frame (uninitialized by default)
+        self.gf = Frame(gf_size)  # global frame
+        self.lf_size = lf_size  # number of slots of local and temporary frames
+        self.blank = [None] * lf_size  # contents of empty local or temporary frame
+        self.free_frames = []  # discarded temporary frames which are reused by CREATEFRAME (at most frame_pool_size)
+
+    # creates new temporary frame, discarded frames are cleared and reused instead of allocating new ones
+    def create_frame(self):
+        if self.tf is not None:  # current temporary frame is discarded, it is reused in place
+            self.tf.reset(self.blank)
+        elif self.free_frames:
+            self.tf = self.free_frames.pop()
+        else:
+            self.tf = Frame(self.lf_size)
+
+    def __repr__(self):
+        return 'GF:' + str(self.gf) + ', LF:' + str(self.lf) + ', TF:' + str(self.tf) + '\n' + str(self.lf_frame_arr)
+
+    # pushes tf into lf stack
+    def lf_push(self):
+        if self.tf is None:
+            raise InterpretExit(55)
+        self.lf_frame_arr.append(self.tf)
+        self.lf_frames_in += 1
+        self.lf = self.tf
+        self.tf = None
+
+    # pops top frame from lf stack into tf
+    def lf_pop(self):
+        if self.lf_frames_in < 1:
+            raise InterpretExit(55)
+        self.lf_frames_in -= 1
+        if self.tf is not None and len(self.free_frames) < frame_pool_size:  # discarded frame is kept for reuse
+            self.tf.reset(self.blank)
+            self.free_frames.append(self.tf)
+        self.tf = self.lf_frame_arr.pop()
+        self.lf = self.lf_frame_arr[-1]
+
+    # returns frame with given id, local and temporary frames must be initialized
+    def get_frame(self, frame_id):
+        if frame_id == GF:
+            return self.gf
+        if frame_id == LF:
+            frame_check(self.lf)
+            return self.lf
+        frame_check(self.tf)
+        return self.tf
+
+    # defines given variable in its frame
+    def ipp_defvar(self, var_arg):
+        frame = self.get_frame(var_arg.frame)
+        var_def_check(frame, var_arg.slot)
+        frame.types[var_arg.slot] = ''  # defined, but uninitialized
+
+    # assigns value and type to given variable (value is already converted to python representation)
+    def ipp_move(self, var_arg, value, value_type):
+        if var_arg.frame == GF:
+            frame = self.gf
+        else:
+            frame = self.get_frame(var_arg.frame)
+        var_slot = var_arg.slot
+        if frame.types[var_slot] is None:  # detects usage of an undefined variable
+            raise InterpretExit(54)
+        frame.values[var_slot] = value
+        frame.types[var_slot] = value_type
+
+    # returns type of given variable
+    def get_var_type(self, var_arg):
+        frame = self.get_frame(var_arg.frame)
+        var_assign_check(frame, var_arg.slot)
+        return frame.types[var_arg.slot]
+
+    # returns value and type of given variable
+    def get_var(self, var_arg):
+        frame = self.get_frame(var_arg.frame)
+        var_assign_check(frame, var_arg.slot)
+        return frame.values[var_arg.slot], frame.types[var_arg.slot]
+
+
+# class represents frame, variables are stored in slots assigned to variable names by compile pass
+# type of a slot is None if variable is not defined and empty string if it is defined but uninitialized
+class Frame:
+    __slots__ = ('values', 'types')
+
+    def __init__(self, size):
+        self.values = [None] * size  # values of variables
+        self.types = [None] * size  # types of variables
+
+    def __repr__(self):
+        return str([(value, var_type) for value, var_type in zip(self.values, self.types) if var_type is not None])
+
+    # clears all variables of the frame, blank is list of None of the size of the frame
+    def reset(self, blank):
+        self.values[:] = blank
+        self.types[:] = blank
+
+
+# class represents mutable string value (stored in a variable by CONCAT to itself and SETCHAR),
+# characters are kept in a list and joined into python string only when the whole value is needed,
+# string builder is owned by exactly one variable, any other usage of the value gets python string
+class StringBuilder:
+    __slots__ = ('chars', 'cache')
+
+    def __init__(self, string):
+        self.chars = list(string)  # characters of the string
+        self.cache = string  # python string representation (None if chars were changed since last join)
+
+    def __repr__(self):
+        return repr(self.text())
+
+    def __len__(self):
+        return len(self.chars)
+
+    def __getitem__(self, index):
+        return self.chars[index]
+
+    # returns python string representation of the value
+    def text(self):
+        if self.cache is None:
+            self.cache = ''.join(self.chars)
+        return self.cache
+
+    # appends given string to the end
+    def extend(self, string):
+        self.chars.extend(string)
+        self.cache = None
+
+    # sets character at given index
+    def set_char(self, index, char):
+        self.chars[index] = char
+        self.cache = None
+
+
+# class represents ipp stack, values and types are kept in two parallel lists of preallocated capacity
+# (slots above size are unused), capacity grows by doubling up to max depth (None if stack is unbounded)
+class Stack:
+    __slots__ = ('values', 'types', 'size', 'capacity', 'max_depth')
+
+    def __init__(self, max_depth=None):
+        self.capacity = default_stack_capacity if max_depth is None else min(default_stack_capacity, max_depth)
+        self.values = [None] * self.capacity  # values of stack items
+        self.types = [None] * self.capacity  # types of stack items
+        self.size = 0  # number of items on the stack
+        self.max_depth = max_depth  # max number of items on the stack
+
+    def __repr__(self):
+        return 'stack: ' + str(list(zip(self.values[:self.size], self.types[:self.size])))
+
+    # enlarges the preallocated lists, exits with code 60 if stack is already at its max depth
+    def grow(self):
+        if self.capacity == self.max_depth:
+            raise InterpretExit(60)
+        extension = self.capacity if self.max_depth is None else min(self.capacity, self.max_depth - self.capacity)
+        self.values.extend([None] * extension)
+        self.types.extend([None] * extension)
+        self.capacity += extension
+
+    # pushes given value and type onto the ipp stack
+    def ipp_pushs(self, var_value, var_type):
+        size = self.size
+        if size == self.capacity:
+            self.grow()
+        self.values[size] = var_value
+        self.types[size] = var_type
+        self.size = size + 1
+
+    # pops value and type from ipp stack directly into slot of given variable
+    def ipp_pops(self, var_arg, frames):
+        size = self.size
+        if size == 0:
+            raise InterpretExit(56)
+        if var_arg.frame == GF:
+            frame = frames.gf
+        else:
+            frame = frames.get_frame(var_arg.frame)
+        var_slot = var_arg.slot
+        if frame.types[var_slot] is None:  # detects usage of an undefined variable
+            raise InterpretExit(54)
+        size -= 1
+        frame.values[var_slot] = self.values[size]
+        frame.types[var_slot] = self.types[size]
+        self.values[size] = None  # popped value is released
+        self.size = size
+
+
+# class keeps approximate number of bytes held by interpreted program: frames (with discarded frames kept for reuse),
+# data stack, call stack and values of variables and stack items, values are accounted incrementally by
+# run_program_accounted, everything else is derived from current sizes of the structures
+class MemoryCounter:
+    def __init__(self, machine):
+        frames = machine.frames
+        stack = machine.stack
+        self.frames = frames  # frames of the run
+        self.stack = stack  # data stack of the run
+        self.ir = machine.ir  # instruction register of the run (call stack)
+        self.frame_bytes = frame_size(Frame(frames.lf_size))  # bytes of empty local or temporary frame
+        self.gf_bytes = frame_size(frames.gf)  # bytes of empty global frame
+        self.value_bytes = 0  # bytes of values of variables and stack items
+        for frame in frames.lf_frame_arr[1:] + [frames.gf, frames.tf]:  # state may be restored from checkpoint
+            if frame is not None:
+                self.value_bytes += frame_values_size(frame)
+        for value in stack.values[:stack.size]:
+            self.value_bytes += value_size(value)
+        self.high_water = self.total()  # max number of bytes held so far
+
+    # returns number of bytes currently held by the program
+    def total(self):
+        frames = self.frames
+        frame_count = frames.lf_frames_in + len(frames.free_frames) + (frames.tf is not None)
+        return (self.gf_bytes + frame_count * self.frame_bytes + self.value_bytes + self.stack.capacity * 16 +
+                len(self.ir.return_address_arr) * 8)
+
+
+# class represents input of ipp program (used by READ), lines are read from the stream lazily
+class InputReader:
+    def __init__(self, stream):
+        self.lines = iter(stream)  # physical lines of the input stream
+        self.pending = deque()  # already read, not yet consumed input lines
+        self.eof = False  # true when input stream is exhausted
+        self.consumed = 0  # number of input lines consumed by READ (input cursor saved in checkpoints)
+
+    # reads physical lines until at least two lines are pending (lookahead of one line) or input ends,
+    # physical line may contain more line boundaries (the same ones str.splitlines uses)
+    def fill(self):
+        while len(self.pending) < 2 and not self.eof:
+            try:
+                self.pending.extend(next(self.lines).splitlines())
+            except StopIteration:
+                self.eof = True
+
+    # returns next input line with decimal escapes substituted, None if there is no more input
+    def read_line(self):
+        self.fill()
+        if not self.pending:
+            return None
+        if self.eof and len(self.pending) == 1 and self.pending[0] == '':  # trim extra empty last line
+            self.pending.pop()
+            return None
+        self.consumed += 1
+        return regex_dec_escapes.sub(replace_dec_escapes, self.pending.popleft())
+
+    # skips given number of input lines (already consumed before checkpoint was saved)
+    def skip(self, count):
+        for _ in range(count):
+            if self.read_line() is None:
+                break
+
+
+# class represents output of ipp program (used by WRITE and DPRINT), written text is collected in a buffer
+# which is written into the stream once it exceeds its size, buffer is flushed when interpretation ends
+class OutputWriter:
+    def __init__(self, stream, buffer_size):
+        self.stream = stream  # output stream
+        self.buffer_size = buffer_size  # max number of buffered characters (0 - no buffering)
+        self.buffer = []  # buffered strings
+        self.buffered = 0  # number of buffered characters
+
+    # writes text into output
+    def write(self, text):
+        if self.buffer_size == 0:
+            self.stream.write(text)
+            return
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered > self.buffer_size:
+            self.flush()
+
+    # drops buffered text which was not written yet
+    def discard(self):
+        self.buffer = []
+        self.buffered = 0
+
+    # writes all buffered text into output stream
+    def flush(self):
+        if self.buffer:
+            self.stream.write(''.join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+        self.stream.flush()
+
+
+# class collects profile of interpreted program: execution counts of instructions, time spent by each opcode,
+# inclusive and exclusive time of called labels and iterations of loops (backward jumps)
+class Profiler:
+    def __init__(self, instr_arr):
+        self.instr_arr = instr_arr  # profiled program
+        self.counts = [0] * (len(instr_arr) + 1)  # execution counts indexed by instruction number
+        self.opcode_counts = [0] * len(opcode_ids)  # execution counts indexed by opcode id
+        self.opcode_times = [0] * len(opcode_ids)  # time in nanoseconds indexed by opcode id
+        self.start = time.perf_counter_ns()
+        self.call_stack = [['(main)', self.start, 0]]  # active calls: label, start time, time spent in callees
+        self.label_times = {'(main)': [1, 0, 0]}  # label -> calls, inclusive time, exclusive time
+        self.active = {'(main)': 1}  # number of active calls of each label (recursion)
+        self.loops = {}  # (label, loop head, instruction with backward jump) -> iterations
+
+    # records one executed instruction
+    def record(self, curr_i, instr, elapsed):
+        self.counts[curr_i] += 1
+        self.opcode_counts[instr.code] += 1
+        self.opcode_times[instr.code] += elapsed
+
+    # records call of given label
+    def call(self, label, now):
+        self.call_stack.append([label, now, 0])
+        times = self.label_times.setdefault(label, [0, 0, 0])
+        times[0] += 1
+        self.active[label] = self.active.get(label, 0) + 1
+
+    # records return from the last called label
+    def ret(self, now):
+        label, start, callees = self.call_stack.pop()
+        inclusive = now - start
+        times = self.label_times[label]
+        times[2] += inclusive - callees
+        self.active[label] -= 1
+        if self.active[label] == 0:  # inclusive time of recursive calls is counted only once
+            times[1] += inclusive
+        if self.call_stack:  # time is added to the caller
+            self.call_stack[-1][2] += inclusive
+
+    # records backward jump from given instruction to given loop head (label)
+    def back_edge(self, label, head, source):
+        self.loops[(label, head, source)] = self.loops.get((label, head, source), 0) + 1
+
+    # finishes all active calls and returns profile report
+    def report(self, exit_code):
+        end = time.perf_counter_ns()
+        while self.call_stack:
+            self.ret(end)
+        instructions = []
+        executed_sources = 0  # executed instructions of source program (superinstruction counts as its sources)
+        for inst_num, count in zip(range(1, len(self.counts)), self.counts[1:]):
+            instr = self.instr_arr[inst_num]
+            instructions.append({'instruction': inst_num, 'order': instr.order, 'opcode': instr.opcode,
+                                 'count': count})
+            executed_sources += count * len(instr.sources())
+        opcode_report = {}
+        for opcode, opcode_id in opcode_ids.items():
+            if self.opcode_counts[opcode_id] > 0:
+                opcode_report[opcode] = {'count': self.opcode_counts[opcode_id],
+                                         'time': self.opcode_times[opcode_id] / 1e9}
+        label_report = {}
+        for label, (calls, inclusive, exclusive) in self.label_times.items():
+            label_report[label] = {'calls': calls, 'inclusive_time': inclusive / 1e9, 'exclusive_time': exclusive / 1e9}
+        loops = []
+        for (label, head, source), iterations in self.loops.items():
+            loops.append({'label': label, 'head': head + 1, 'back_edge': source,
+                          'iterations': iterations, 'instructions': sum(self.counts[head + 1:source + 1])})
+        loops.sort(key=lambda x: x['instructions'], reverse=True)
+        return {'exit_code': exit_code,
+                'executed': sum(self.counts),
+                'executed_sources': executed_sources,
+                'time': (end - self.start) / 1e9,
+                'instructions': instructions,
+                'opcodes': opcode_report,
+                'labels': label_report,
+                'hot_loops': loops,
+                }
+
+
+# class reads values from content of binary files (checkpoints and binary programs), every read moves position
+# in the data
+class BinaryReader:
+    def __init__(self, data):
+        self.data = data  # content of binary file
+        self.pos = 0  # position of next read
+
+    # returns tuple of values unpacked according to given struct format
+    def unpack(self, fmt):
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values
+
+    # returns given number of raw bytes
+    def read_bytes(self, count):
+        if self.pos + count > len(self.data):
+            raise struct.error('checkpoint data truncated')
+        self.pos += count
+        return self.data[self.pos - count:self.pos]
+
+    # returns string (stored by pack_string)
+    def read_string(self):
+        length, = self.unpack('<I')
+        return self.read_bytes(length).decode('utf-8', 'surrogatepass')
+
+    # returns value and type of one slot (stored by pack_value)
+    def read_value(self):
+        tag, length = self.unpack('<BI')
+        value_type = checkpoint_types[tag]
+        data = self.read_bytes(length)
+        if value_type == 'int':
+            return int(data), value_type
+        if value_type == 'bool':
+            return data == b'\x01', value_type
+        if value_type == 'string':
+            return data.decode('utf-8', 'surrogatepass'), value_type
+        if value_type == 'nil':
+            return 'nil', value_type
+        return None, value_type  # undefined or uninitialized variable
+
+    # returns frame with given number of slots (stored by pack_frame), None if frame was not initialized
+    def read_frame(self, size):
+        initialized, = self.unpack('<B')
+        if not initialized:
+            return None
+        frame_size, = self.unpack('<I')
+        if frame_size != size:  # checkpoint of a different program
+            raise InterpretExit(11)
+        frame = Frame(size)
+        for var_slot in range(size):
+            frame.values[var_slot], frame.types[var_slot] = self.read_value()
+        return frame
+
+
+# class reads binary program (written by pack_program), arguments are shared by instructions with the same variable or
+# constant (only label arguments are changed by optimizer), instruction records are read by precompiled structs
+class ProgramReader(BinaryReader):
+    instr_struct = struct.Struct('<QBB')
+    arg_structs = [struct.Struct('<' + 'BBI' * arg_count) for arg_count in range(4)]  # indexed by argument count
+    frame_names = list(frame_ids)  # indexed by frame id
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.var_names = []  # names of variables indexed by frame id and slot
+        self.label_dict = {}  # labels of the program (label name -> instruction number)
+        self.constants = []  # constant pool (tuples of type and pre-decoded value)
+        self.var_args = {}  # (frame id, slot) -> argument
+        self.const_args = []  # constant pool index -> argument
+
+    # returns pre-decoded instruction read from its record, exits with code 32 if the instruction is not valid (53 if
+    # its argument has wrong type), only source opcodes are valid (fast and fused instructions are never trusted)
+    def read_instruction(self):
+        order, code, arg_count = self.instr_struct.unpack_from(self.data, self.pos)
+        self.pos += self.instr_struct.size
+        if order == max_packed_order:
+            order = int(self.read_string())
+        name = opcode_names[code]
+        if name not in opcodes or arg_count != len(opcodes[name]):
+            raise InterpretExit(32)
+        instr = Instruction(name)
+        instr.order = order
+        arg_struct = self.arg_structs[arg_count]
+        arg_fields = arg_struct.unpack_from(self.data, self.pos)
+        self.pos += arg_struct.size
+        for arg_no in range(arg_count):
+            type_tag, frame_id, index = arg_fields[3 * arg_no:3 * arg_no + 3]
+            arg_type = types[type_tag]
+            if not check_argument_type(arg_type, opcodes[name][arg_no]):
+                raise InterpretExit(53)
+            if arg_type == 'var':
+                arg = self.var_args.get((frame_id, index))
+                if arg is None:
+                    var_name = self.var_names[frame_id][index]
+                    arg = self.var_args[(frame_id, index)] = Argument(arg_type, self.frame_names[frame_id] + '@' +
+                                                                      var_name)
+                    arg.frame = frame_id
+                    arg.name = var_name
+                    arg.slot = index
+            else:
+                arg = self.const_args[index]
+                if arg is None or arg.type != arg_type:
+                    const_type, value = self.constants[index]
+                    if const_type != arg_type:
+                        raise InterpretExit(32)
+                    arg = Argument(arg_type, value)
+                    if arg_type == 'label':
+                        arg.target = self.label_dict.get(value)
+                    else:
+                        self.const_args[index] = arg
+            instr.args[arg_no + 1] = arg
+        instr.arg_num = arg_count + 1
+        instr.link()
+        return instr
+
+
+# class reads binary stream whose first bytes were already read (they are returned by the first read)
+class PrefixedStream:
+    def __init__(self, prefix, stream):
+        self.prefix = prefix  # bytes read from the stream in advance
+        self.stream = stream  # rest of the stream
+
+    # returns at most given number of bytes (all remaining bytes if size is negative)
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.stream.read(size)
+        data = self.prefix
+        self.prefix = b''
+        if size < 0:
+            return data + self.stream.read()
+        return data
+
+
+# class compiles basic blocks of the program into python functions when they are executed for the first time,
+# block function executes instructions of the block and returns number of the next instruction to be executed,
+# FAST instructions are generated inline and keep values of global variables in python locals, other instructions
+# call their handlers (locals are written back into global frame before every handler call and at the end of block),
+# block function gets state of the run (Machine) as its argument, so compiled blocks are shared by all runs
+class BlockCompiler:
+    def __init__(self, instr_arr):
+        import threading  # imported only by runs with --jit, short runs do not pay for it
+        self.instr_arr = instr_arr  # compiled program
+        self.leaders = basic_blocks(instr_arr)[0]  # sorted first instructions of basic blocks
+        self.functions = [None] * (len(instr_arr) + 1)  # compiled blocks indexed by their first instruction
+        self.lines = []  # lines of body of currently generated function
+        self.bound = []  # objects used by generated code (names of parameters and values)
+        self.loaded = set()  # slots of global variables whose values are in locals
+        self.changed = {}  # slots of global variables changed only in locals -> their types
+        self.leader = None  # first instruction of currently generated block
+        self.looping = False  # true if block jumps back to its start (block function then loops itself)
+        self.uses_globals = False  # true if generated code reads or writes global frame (gv and gt)
+        self.uses_ir = False  # true if generated code uses instruction register (ir)
+        self.lock = threading.Lock()  # concurrent runs of the program compile blocks one at a time
+
+    # returns python function executing block which starts with given instruction (instruction may be in the middle
+    # of basic block, block then starts there)
+    def compile_block(self, leader):
+        with self.lock:
+            if self.functions[leader] is None:  # block may have been compiled by another run meanwhile
+                self.generate_block(leader)
+        return self.functions[leader]
+
+    # generates and compiles function of block which starts with given instruction
+    def generate_block(self, leader):
+        block_index = bisect.bisect_right(self.leaders, leader)
+        end = self.leaders[block_index] if block_index < len(self.leaders) else len(self.instr_arr) + 1
+        end = min(end, leader + jit_block_size)
+        self.lines = []
+        self.bound = []
+        self.loaded = set()
+        self.changed = {}
+        self.leader = leader
+        self.looping = False
+        self.uses_globals = False
+        self.uses_ir = False
+        ended = False
+        for inst_num in range(leader, end):
+            ended = self.instruction(inst_num, self.instr_arr[inst_num])
+        if not ended:
+            self.write_back()
+            self.lines.append('return ' + str(end))
+        if self.looping:
+            self.lines = ['while True:'] + ['    ' + line for line in self.lines]
+        if self.uses_globals:
+            self.lines[:0] = ['gv = machine.frames.gf.values', 'gt = machine.frames.gf.types']
+        if self.uses_ir:
+            self.lines[:0] = ['ir = machine.ir']
+        params = ', '.join(name for name, _ in self.bound)
+        source = 'def make_block(' + params + '):\n    def block(machine):\n'
+        source += ''.join('        ' + line + '\n' for line in self.lines) + '    return block\n'
+        namespace = {}
+        exec(compile(source, '<block ' + str(leader) + '>', 'exec'), globals(), namespace)
+        self.functions[leader] = namespace['make_block'](*[value for _, value in self.bound])
+
+    # generates code of one instruction, returns True if the code returns from block function
+    def instruction(self, inst_num, instr):
+        if instr.opcode in jit_operators:
+            operator, result_type = jit_operators[instr.opcode]
+            if result_type is None:  # FASTJUMPIFEQ, FASTJUMPIFNEQ
+                condition = self.operand(instr.arg2) + ' ' + operator + ' ' + self.operand(instr.arg3)
+            else:
+                expression = self.operand(instr.arg2) + ' ' + operator + ' ' + self.operand(instr.arg3)
+                result = self.store(instr.arg1.slot, expression, result_type)
+                if instr.label_arg is None:
+                    return False
+                if instr.arg5 is not None:  # FASTADDJUMP, FASTSUBJUMP compare result with symbol
+                    condition = '(' + result + ' == ' + self.operand(instr.arg5) + ') == ' + repr(instr.jump_when)
+                else:
+                    condition = result + ' == ' + repr(instr.jump_when)
+            self.write_back()
+            if instr.label_arg.target + 1 == self.leader:  # loop, jump back continues in block function
+                self.looping = True
+                self.lines.append('if not (' + condition + '):')
+                self.lines.append('    return ' + str(inst_num + 1))
+            else:
+                self.lines.append('return ' + str(instr.label_arg.target + 1) + ' if ' + condition + ' else ' +
+                                  str(inst_num + 1))
+            return True
+        handler = dispatch_table[instr.code]
+        if handler is exec_nop:
+            return False
+        if instr.opcode in ('JUMP', 'TAILCALL') and instr.arg1.target is not None:
+            self.write_back()
+            if instr.arg1.target + 1 == self.leader:  # infinite loop in block function
+                self.looping = True
+                self.lines.append('continue')  # loop body must not be empty
+            else:
+                self.lines.append('return ' + str(instr.arg1.target + 1))
+            return True
+        self.write_back()
+        self.loaded.clear()  # handler may change global variables
+        call = self.bind(handler) + '(' + self.bind(instr) + ', machine)'
+        if instr.label_arg is not None or instr.opcode == 'RETURN':  # handler changes instruction register
+            self.uses_ir = True
+            self.lines += ['ir.curr_i = ' + str(inst_num), call, 'return ir.curr_i + 1']
+            return True
+        self.lines.append(call)
+        return False
+
+    # returns name of parameter of generated function bound to given object
+    def bind(self, value):
+        name = 'b' + str(len(self.bound))
+        self.bound.append((name, value))
+        return name
+
+    # returns expression with value of symbol (global variable is loaded into local if it is not already there)
+    def operand(self, symb_arg):
+        if symb_arg.type != 'var':
+            return repr(symb_arg.val)
+        if symb_arg.slot not in self.loaded:
+            self.uses_globals = True
+            self.lines.append('g' + str(symb_arg.slot) + ' = gv[' + str(symb_arg.slot) + ']')
+            self.loaded.add(symb_arg.slot)
+        return 'g' + str(symb_arg.slot)
+
+    # generates assignment of expression of given type into local of global variable, returns name of the local
+    def store(self, var_slot, expression, value_type):
+        self.lines.append('g' + str(var_slot) + ' = ' + expression)
+        self.loaded.add(var_slot)
+        self.changed[var_slot] = value_type
+        return 'g' + str(var_slot)
+
+    # generates code writing changed locals back into global frame
+    def write_back(self):
+        for var_slot, value_type in self.changed.items():
+            self.uses_globals = True
+            self.lines.append('gv[' + str(var_slot) + '] = g' + str(var_slot))
+            self.lines.append('gt[' + str(var_slot) + '] = ' + repr(value_type))
+        self.changed = {}
+
+
+# class represents instruction register
+class InstructionRegister:
+    def __init__(self):
+        self.label_dict = {}  # dict of labels in the code
+        self.return_address_arr = []  # stack for return addresses (when using jump instruction)
+        self.curr_i = 1  # stores number of current instruction
+
+    def __repr__(self):
+        return 'labels: ' + str(self.label_dict) + '\nret_addresses:' + str(self.return_address_arr)
+
+    # adds a new label
+    def ipp_label(self, label_name):
+        self.label_def_check(label_name)
+        self.label_dict[label_name] = self.curr_i
+
+    # performs jump to pre-resolved label address
+    def ipp_jump(self, label_arg):
+        self.label_use_check(label_arg)
+        self.curr_i = label_arg.target
+
+    # performs jump and saves return address
+    def ipp_call(self, label_arg):
+        self.label_use_check(label_arg)
+        self.return_address_arr.append(self.curr_i)
+        self.curr_i = label_arg.target
+
+    # performs return
+    def ipp_return(self):
+        if len(self.return_address_arr) == 0:
+            raise InterpretExit(56)
+        self.curr_i = self.return_address_arr.pop()
+
+    # detects repeated label definition
+    def label_def_check(self, label_name):
+        if label_name in self.label_dict:
+            raise InterpretExit(52)
+
+    # detects usage of a non existent label (label argument was not resolved by compile pass)
+    def label_use_check(self, label_arg):
+        if label_arg.target is None:
+            raise InterpretExit(52)
+
+
+# classes used for xml document representation
+# class represents one instruction argument
+class Argument:
+    def __init__(self, arg_type, arg_val):
+        # empty strings conversion (they are returned as none from xml document)
+        if arg_type == 'string' and arg_val is None:
+            arg_val = ''
+        self.type = arg_type  # argument type
+        self.val = arg_val  # argument value
+        self.frame = None  # frame id of variable argument (set by compile pass)
+        self.name = None  # variable name without frame prefix (set by compile pass)
+        self.slot = None  # slot index of variable in its frame (set by compile pass)
+        self.target = None  # label address (set by compile pass, stays None for undefined labels)
+
+    def __repr__(self):
+        return self.type + ' ' + str(self.val)
+
+    # pre-decodes argument: converts constants to python representation, assigns variables frame slots,
+    # resolves labels, slot_tables is list of dicts (variable name -> slot index) indexed by frame id
+    def compile(self, label_dict, slot_tables):
+        if self.type == 'var':
+            var_frame, var_name = self.val.split('@')
+            self.frame = frame_ids[var_frame]
+            self.name = sys.intern(var_name)
+            self.slot = slot_tables[self.frame].setdefault(self.name, len(slot_tables[self.frame]))
+        elif self.type == 'int':
+            self.val = int(self.val)
+        elif self.type == 'bool':
+            self.val = bool_map[self.val]
+        elif self.type == 'label':
+            self.target = label_dict.get(self.val)
+
+
+# class represents one instruction
+class Instruction:
+    def __init__(self, name):
+        self.opcode = name  # instruction name
+        self.code = opcode_ids[name]  # integer opcode id (index into dispatch table)
+        self.order = None  # value of order attribute (set when instructions are sorted)
+        self.arg_num = 1  # no of argument (default is 1)
+        self.args = {}  # dict of arguments of instruction
+        self.arg1 = self.arg2 = self.arg3 = None  # direct references to arguments (set by compile pass)
+        self.arg4 = self.arg5 = None  # additional arguments of superinstructions
+        self.label_arg = None  # first label argument (jump target)
+        self.jump_when = None  # result of tested condition for which superinstruction jumps
+        self.dest_is_arg2 = False  # true if second argument is the same variable as the first one (set by compile pass)
+        self.origin = None  # source instructions replaced by this instruction (None if it is a source instruction)
+
+    # adds new instruciton argument
+    def add_arg(self, arg_type, arg_val):
+        self.args[self.arg_num] = Argument(arg_type, arg_val)
+        self.arg_num += 1
+
+    # returns argument with given number
+    def arg(self, arg_num):
+        return self.args[arg_num]
+
+    # pre-decodes all arguments of the instruction
+    def compile(self, label_dict, slot_tables):
+        for arg in self.args.values():
+            arg.compile(label_dict, slot_tables)
+        self.link()
+
+    # sets direct references to already pre-decoded arguments
+    def link(self):
+        self.arg1 = self.args.get(1)
+        self.arg2 = self.args.get(2)
+        self.arg3 = self.args.get(3)
+        self.arg4 = self.args.get(4)
+        self.arg5 = self.args.get(5)
+        self.dest_is_arg2 = same_var(self.arg1, self.arg2)
+        self.label_arg = None
+        for arg in self.args.values():
+            if arg.type == 'label':
+                self.label_arg = arg
+                break
+
+    # returns new instruction with given opcode and already pre-decoded arguments, keeps order of this instruction,
+    # new instruction replaces this instruction and given instructions following it
+    def rewrite(self, name, args, replaced=()):
+        instr = Instruction(name)
+        for arg in args:
+            instr.args[instr.arg_num] = arg
+            instr.arg_num += 1
+        instr.order = self.order
+        instr.origin = self.sources()
+        for replaced_instr in replaced:
+            instr.origin = instr.origin + replaced_instr.sources()
+        instr.link()
+        return instr
+
+    # returns list of source instructions replaced by this instruction (the instruction itself if it is from source)
+    def sources(self):
+        return self.origin if self.origin is not None else [self]
+
+    # adds source instructions of given removed instructions, which were executed just before this instruction (before
+    # is true) or just after it, breakpoints and diagnostics of removed instructions then refer to this instruction
+    def absorb(self, removed, before):
+        self.origin = removed + self.sources() if before else self.sources() + removed
+
+    def __add__(self, other):
+        return self.opcode + other
+
+    def __eq__(self, other):
+        return self.opcode == other
+
+    def __repr__(self):
+        return self.opcode
+
+
+# class represents the whole xml program
+class InstructionArray:
+    def __init__(self):
+        self.root = [None]  # instructions indexed by instruction number (numbered from 1, first item is unused)
+        self.order_index = {}  # order attribute -> instruction number (used only by diagnostics)
+        self.end_origin = []  # source instructions removed from the end of program by optimizer
+        self.label_orders = {}  # label name -> order of instruction after the label in source program (breakpoints)
+        self.loaded = []  # list of loaded instructions with their order attribute (before sorting)
+        self.gf_slots = {}  # slot indexes of global frame variables
+        self.lf_slots = {}  # slot indexes of local and temporary frame variables (temporary frame becomes local)
+
+    # adds loaded instruction with its order attribute, instructions may come in any order
+    def add(self, order, instr):
+        self.loaded.append((order, instr))
+
+    # sorts loaded instructions by their order attribute and numbers them from 1 (order values may be sparse)
+    def sort(self):
+        self.loaded.sort(key=lambda x: x[0])
+        for order, instr in self.loaded:
+            instr.order = order
+        self.set_program([instr for _, instr in self.loaded])
+        self.loaded = []
+
+    # replaces instructions by given list of instructions (numbered from 1) and rebuilds index of their orders,
+    # orders of source instructions replaced by an instruction are indexed too, orders of instructions removed from
+    # the end of program get the number after the last instruction
+    def set_program(self, program):
+        self.root = [None] + program
+        self.order_index = {source.order: len(program) + 1 for source in self.end_origin}
+        for inst_num in range(len(program), 0, -1):  # the first of instructions with the same order is indexed
+            for source in self.root[inst_num].sources():
+                self.order_index[source.order] = inst_num
+
+    # saves orders of instructions following labels of given dict of labels (label name -> instruction number) before
+    # any pass fuses or removes instructions, order of the label itself is saved if it is the last instruction
+    def index_labels(self, label_dict):
+        self.label_orders = {label_name: self.root[min(inst_num + 1, len(self))].order
+                             for label_name, inst_num in label_dict.items()}
+
+    # returns instruction number of instruction with given order attribute (or of instruction which replaced it),
+    # None if there is no such instruction
+    def position(self, order):
+        return self.order_index.get(order)
+
+    def __len__(self):
+        return len(self.root) - 1
+
+    def __repr__(self):
+        output = ''
+        for key, value in zip(range(1, len(self.root)), self.root[1:]):
+            output += str(key) + '. ' + str(value) + '\n'
+            for a_key, a_value in value.args.items():
+                output += '  - arg' + str(a_key) + ' ' + str(a_value.val) + ' (' + a_value.type + ')\n'
+        return output
+
+    def __getitem__(self, ia_item):
+        return self.root[ia_item]
+
+    # load-time compile pass, pre-decodes arguments of all instructions (labels must be already collected)
+    def compile(self, label_dict):
+        slot_tables = [self.gf_slots, self.lf_slots, self.lf_slots]  # indexed by frame id
+        for instr in self.root[1:]:
+            instr.compile(label_dict, slot_tables)
+
+
+# class represents state of one run of the program passed to instruction handlers: interpreted program, frames, data
+# stack, instruction register, input and outputs of WRITE and DPRINT (runs of the same or different interpreters
+# have separate states, so they can run concurrently)
+class Machine:
+    __slots__ = ('ia', 'frames', 'stack', 'ir', 'input_reader', 'output', 'error_output')
+
+    def __init__(self, instr_arr, label_dict, stack_limit, input_reader, output, error_output):
+        self.ia = instr_arr  # interpreted program
+        self.frames = FrameStack(len(instr_arr.gf_slots), len(instr_arr.lf_slots))
+        self.stack = Stack(stack_limit)
+        self.ir = InstructionRegister()
+        self.ir.label_dict = label_dict
+        self.input_reader = input_reader  # input of READ
+        self.output = output  # output of WRITE
+        self.error_output = error_output  # output of DPRINT and diagnostics
+
+
+# class represents interpreter of IPPcode21, options are program options (option name -> value, None if option has
+# no value) as they are given on command line, program is loaded once by load and interpreted by run any number
+# of times (every run starts with fresh frames, stack and instruction register in its own Machine, runs may be
+# concurrent), errors are raised as InterpretExit
+class Interpreter:
+    def __init__(self, options=None):
+        self.options = dict(options) if options is not None else {}  # program options
+        check_options(self.options)
+        self.output_buffer_size = int(self.options.get('output-buffer', default_output_buffer_size))
+        self.step_limit = int(self.options['max-steps']) if 'max-steps' in self.options else None
+        self.time_limit = float(self.options['max-time']) if 'max-time' in self.options else None
+        self.stack_limit = int(self.options['max-stack']) if 'max-stack' in self.options else None
+        self.memory_limit = memory_size(self.options['max-memory']) if 'max-memory' in self.options else None
+        self.memory_stats = int(self.options['memory-stats']) if 'memory-stats' in self.options else None
+        self.instr_arr = None  # loaded program
+        self.label_dict = {}  # labels of loaded program (label name -> instruction number)
+        self.block_compiler = None  # block compiler of loaded program (--jit)
+        self.fingerprint = None  # fingerprint of loaded program written into checkpoints (--checkpoint, --resume)
+        self.eliminated = None  # number of instructions eliminated by optimizer (None without --optimize)
+
+    # loads program from given xml source document or binary program (binary stream or bytes), xml document may be
+    # given as text too (text stream or str)
+    def load(self, source):
+        if isinstance(source, io.TextIOBase):
+            source = source.read()
+        if source.__class__ is str:  # text is parsed as utf-8 encoded document
+            source = source.encode('utf-8')
+        if source.__class__ is bytes:
+            source = io.BytesIO(source)
+        instr_arr = None
+        header = source.read(len(binary_magic))  # binary program is recognized by its header
+        if header == binary_magic:  # binary program is already validated and pre-decoded
+            instr_arr, self.label_dict = load_binary_program(header + source.read())
+        elif 'cache' in self.options:  # prepared program is loaded from cache if the same source was already run
+            source_data = header + source.read()
+            cache_key = program_cache_key(source_data)
+            cache_file_name = os.path.join(self.options['cache'], cache_key.hex() + '.ippc')
+            cached_program = load_cached_program(cache_file_name, cache_key)
+            if cached_program is not None:
+                instr_arr, self.label_dict = cached_program
+            source = io.BytesIO(source_data)
+        else:
+            source = PrefixedStream(header, source)
+
+        if instr_arr is None:
+            # single pass over the document, checks validity and builds program representation
+            instr_arr = load_program(source)
+
+            # prerun, saves all label names with their addresses (instruction numbers)
+            label_register = InstructionRegister()
+            while label_register.curr_i <= len(instr_arr):
+                curr_opcode = instr_arr[label_register.curr_i]  # current instruction
+
+                # LABEL label
+                if curr_opcode == 'LABEL':
+                    label_register.ipp_label(curr_opcode.arg(1).val)
+
+                label_register.curr_i += 1  # increment instruction counter
+
+            self.label_dict = label_register.label_dict
+            instr_arr.compile(self.label_dict)  # pre-decode all instructions and assign slots to variables
+            if 'cache' in self.options:
+                save_cached_program(cache_file_name, instr_arr, self.label_dict, cache_key)
+        if 'emit-binary' in self.options:  # program is only converted, later passes are not needed
+            save_binary_program(self.options['emit-binary'], instr_arr, self.label_dict)
+            self.instr_arr = instr_arr
+            return
+
+        # passes are never skipped for loaded programs, fast instructions are only valid for types inferred here
+        instr_arr.index_labels(self.label_dict)  # breakpoints on labels are found by source orders
+        fuse_instructions(instr_arr, self.label_dict)  # compare-and-branch superinstructions
+        infer_types(instr_arr)  # unchecked fast variants of instructions with proven operand types
+        self.instr_arr = instr_arr
+
+        # passes depending on options (they keep fast instructions valid, values reaching them do not change)
+        if 'optimize' in self.options:
+            self.eliminated = optimize(instr_arr, self.label_dict, self.stack_limit)
+        if 'checkpoint' in self.options or 'resume' in self.options:  # tail calls do not change saved state
+            self.fingerprint = program_fingerprint(instr_arr)
+        # profile reports every call, dumps of limits and breakpoints show every call on the call stack
+        if not any(name in self.options for name in ('profile', 'max-steps', 'max-time', 'max-memory', 'trace',
+                                                     'break')):
+            tail_calls(instr_arr)
+        self.block_compiler = BlockCompiler(instr_arr) if 'jit' in self.options else None
+
+    # interprets loaded program with given input stream, output of WRITE and DPRINT is written into given streams
+    # (standard error output by default, report of optimizer is written there too), returns exit code of the program
+    # (0 if it ends without EXIT), exits with code 99 if no program was loaded
+    def run(self, input_stream, output_stream, error_stream=None):
+        if self.instr_arr is None:  # internal error of the caller
+            raise InterpretExit(99)
+        # output of checkpointed run is written only together with checkpoints (and at the end)
+        output = OutputWriter(output_stream, float('inf') if 'checkpoint' in self.options else self.output_buffer_size)
+        error_output = OutputWriter(error_stream if error_stream is not None else sys.stderr, self.output_buffer_size)
+        machine = Machine(self.instr_arr, self.label_dict, self.stack_limit, InputReader(input_stream), output,
+                          error_output)
+        if self.eliminated is not None:
+            error_output.write('optimizer: ' + str(self.eliminated) + ' instructions eliminated\n')
+        try:
+            self.execute(machine)
+        except ProgramExit as exit_exception:
+            return exit_exception.code
+        finally:  # buffered output is flushed at the end of program, after EXIT and after runtime errors too
+            output.flush()
+            error_output.flush()
+        return 0
+
+    # interprets the program in given state of the run by interpretation loop selected by options
+    def execute(self, machine):
+        options = self.options
+        if 'resume' in options:  # continue from saved state instead of the first instruction
+            load_checkpoint(machine, options['resume'], self.fingerprint)
+
+        if 'profile' in options:  # profiled run, report is written at exit
+            profiler = Profiler(self.instr_arr)
+            exit_code = 0
+            try:
+                run_program_profiled(machine, profiler)
+            except InterpretExit as exit_exception:
+                exit_code = exit_exception.code
+                raise
+            finally:
+                try:
+                    with open(options['profile'], 'w') as profile_file:
+                        json.dump(profiler.report(exit_code), profile_file, indent=1)
+                except OSError:  # profile report cannot be written
+                    raise InterpretExit(12)
+        elif 'checkpoint' in options:
+            run_program_checkpointed(machine, options['checkpoint'],
+                                     int(options.get('checkpoint-interval', default_checkpoint_interval)),
+                                     self.fingerprint)
+        elif 'trace' in options:
+            breakpoints = breakpoint_set(machine, options.get('break'))
+            try:
+                trace_file = open(options['trace'], 'wb')
+            except OSError:  # trace file cannot be created
+                raise InterpretExit(12)
+            with trace_file:
+                write_trace_header(machine, trace_file)
+                run_program_traced(machine, trace_file, breakpoints)
+        elif 'break' in options:
+            run_program_traced(machine, None, breakpoint_set(machine, options['break']))
+        elif self.memory_limit is not None or self.memory_stats is not None:
+            run_program_accounted(machine, self.step_limit, self.time_limit, self.memory_limit, self.memory_stats)
+        elif self.block_compiler is not None:
+            run_program_jit(machine, self.block_compiler)
+        elif self.step_limit is None and self.time_limit is None:
+            run_program(machine)
+        else:
+            run_program_limited(machine, self.step_limit, self.time_limit)
+
+
+# ### end of class definitions ### #
+
+
+# ### FUNCTIONS ### #
+# displays program usage help
+def display_help():
+    print('''interpret.py  |  version 1.0  |  xdudaj02
+interpreter for IPPcode21
+
+USAGE:
+  python3.8 interpret.py --source=source_file --input=input_file >output      classic IPPcode21 interpretation
+  python3.8 interpret.py --source=source_file <input_file >output             classic IPPcode21 interpretation
+  python3.8 interpret.py --input=input_file <source_file >output              classic IPPcode21 interpretation
+  python3.8 interpret.py --source=source_file --batch=path --batch-output=dir  interpretation with many inputs
+  python3.8 interpret.py --source=source_file --emit-binary=file              conversion into binary program
+  python3.8 interpret.py --help                                               display help
+
+ARGUMENTS:  
+  source_file         file containing source code written in IPPcode21 (xml document or binary program)
+  input_file          file containing input for IPPcode21 interpreter
+    -at least one of source_file and input_file must be provided through command line argument,
+    -other one is expected on stdin
+
+OPTIONS:
+  --output-buffer=N   size of output buffer in characters (default 65536), 0 writes output immediately
+  --profile=file      profile interpreted program, json report is written into given file at exit (executed
+                      counts fused instructions once, executed_sources counts instructions of the source)
+  --optimize          peephole optimization of the program before interpretation,
+                      number of eliminated instructions is written to stderr
+  --checkpoint=file   state of interpreter (frames, stack, instruction register, input position) is saved
+                      into given file periodically, output is held back and written only when a checkpoint
+                      is saved (so interrupted run ends its output exactly at its last checkpoint), checkpoint
+                      is deleted when the program ends or exits by EXIT (it is kept after runtime errors)
+  --checkpoint-interval=N
+                      number of executed instructions between checkpoints (default 1000000)
+  --resume=file       continue interpretation from given checkpoint, source, input and --optimize must be
+                      the same as in the interrupted run, output of resumed run continues exactly where output
+                      of the interrupted run ended (it should be appended to it) if the run used --checkpoint,
+                      exit code 11 if checkpoint cannot be read or belongs to another program
+  --cache=dir         validated and pre-decoded program is stored in given directory, next run of the same
+                      source skips xml parsing, cache is not used after source or interpreter changes
+  --batch=path        program is loaded once and interpreted with every input file in given directory or listed
+                      in given manifest file (one path per line), every run starts with fresh frames and stack,
+                      cannot be combined with --input, --profile, --checkpoint and --resume
+  --batch-output=dir  directory for results of batch runs, output of input file name is written into name.out
+                      and exit code into name.rc (mandatory with --batch)
+  --jobs=N            number of parallel processes of batch mode (default 1)
+  --max-steps=N       interpretation ends with exit code 59 after N executed instructions
+  --max-time=T        interpretation ends with exit code 59 after T seconds (checked every 1000 instructions),
+                      next instruction and call stack are written to stderr when limit is exceeded,
+                      limits cannot be combined with --profile and --checkpoint
+  --jit               basic blocks of the program are compiled into python functions when they are executed
+                      for the first time, cannot be combined with --profile, --checkpoint and limits
+  --max-stack=N       interpretation ends with exit code 60 when PUSHS would put more than N values on the stack
+  --trace=file        every executed instruction is logged with values of its operands into given binary file,
+                      the trace is summarized by replay.py
+  --break=list        comma separated list of breakpoints (order numbers of instructions or label names),
+                      state of interpreter is written to stderr whenever a breakpoint or BREAK is reached,
+                      tracing and breakpoints cannot be combined with --profile, --checkpoint, limits and --jit
+  --max-memory=N      interpretation ends with exit code 61 when approximate memory held by the program (frames,
+                      stacks and values of variables) exceeds N bytes (suffix K, M or G multiplies by 1024^1..3),
+                      next instruction and call stack are written to stderr when limit is exceeded
+  --memory-stats=N    executed instructions, time, current and high-water memory of the program are written to
+                      stderr every N instructions and at the end of interpretation, memory accounting cannot be
+                      combined with --profile, --checkpoint, --jit, --trace and --break
+  --emit-binary=file  validated program is written into given file as compact binary program and it is not
+                      interpreted (nor optimized), binary program is loaded instead of xml source faster (it is
+                      recognized by its header), exit code 31 if binary program is corrupted, 11 if it was written
+                      by an interpreter with different instruction set, cannot be combined with --input and --batch
+          ''')
+
+
+# checks argument type validity
+def check_argument_type(actual, expected):
+    return actual in type_validity[expected]
+
+
+# checks whether given value is of the given type
+def check_type_validity(actual_type, actual_value):
+    if actual_type == 'nil':
+        return actual_value == 'nil'
+    if actual_type == 'string':
+        return value_regexes['string'].fullmatch(empty_string_map(actual_value))
+    if actual_value is None:  # only string may be empty
+        return False
+    return value_regexes[actual_type].fullmatch(actual_value)
+
+
+# converts value of given type to its ipp output representation
+def output_repr(value, value_type):
+    if value_type == 'int':  # convert int to str
+        return str(value)
+    if value_type == 'bool':  # correctly convert bool value to ipp representation of bool
+        if value:
+            return 'true'
+        return 'false'
+    if value_type == 'nil':  # convert nil to its ipp representation
+        return ''
+    return value
+
+
+# converts pre-decoded argument to its IPPcode21 text representation (whitespace, # and backslash are escaped)
+def argument_repr(arg):
+    if arg.type in ('var', 'label', 'type'):
+        return arg.val
+    return value_repr(arg.val, arg.type)
+
+
+# converts value of given type to its IPPcode21 constant representation (whitespace, # and backslash are escaped)
+def value_repr(value, value_type):
+    if value.__class__ is StringBuilder:
+        value = value.text()
+    text = output_repr(value, value_type) if value_type != 'nil' else 'nil'
+    text = ''.join('\\%03d' % ord(char) if ord(char) <= 32 or char in '#\\' else char for char in text)
+    return value_type + '@' + text
+
+
+# converts instruction to its IPPcode21 text representation prefixed by its order, instruction created by optimizer or
+# by fusing instructions is represented by source instructions it replaced (separated by semicolons)
+def instruction_repr(instr):
+    return '; '.join([source_repr(source) for source in instr.sources()])
+
+
+# converts source instruction to its IPPcode21 text representation prefixed by its order
+def source_repr(instr):
+    operands = [argument_repr(arg) for arg in instr.args.values()]
+    return '[' + str(instr.order) + '] ' + ' '.join([instr.opcode] + operands)
+
+
+# checks whether given pre-decoded arguments are the same variable
+def same_var(arg1, arg2):
+    if arg1 is None or arg2 is None or arg1.type != 'var' or arg2.type != 'var':
+        return False
+    return arg1.frame == arg2.frame and arg1.slot == arg2.slot
+
+
+# corrects empty string wrongly represented as None
+def empty_string_map(string):
+    if string is None:
+        return ''
+    else:
+        return string
+
+
+# calculates and returns a character from its decimal escaped representation
+def replace_dec_escapes(match):
+    return chr(int(match.group(1)))
+
+
+# checks validity of program (root) element, returns exit code (0 if element is valid)
+def check_program_element(xml_root):
+    if xml_root.tag != 'program':  # root element name = program
+        return 32
+    if len(xml_root.attrib) > 3:  # max 3 attributes in program element
+        return 32
+    for item in xml_root.attrib:  # allowed attribute names
+        if item not in ['language', 'name', 'description']:
+            return 32
+    if 'language' not in xml_root.attrib.keys():  # mandatory attribute
+        return 32
+    if xml_root.attrib['language'] != 'IPPcode21':  # mandatory language attribute value
+        return 32
+    return 0
+
+
+# checks validity of instruction element and adds it to instruction array, returns exit code (0 if element is valid)
+def load_instruction(xml_inst, instr_arr, order_set):
+    if xml_inst.tag != 'instruction':  # mandatory instruction element name
+        return 32
+    if len(xml_inst.attrib) != 2:  # two mandatory attributes
+        return 32
+    if 'order' not in xml_inst.attrib.keys() or 'opcode' not in xml_inst.attrib.keys():  # names of mandatory attributes
+        return 32
+    try:
+        order = int(xml_inst.attrib['order'])  # order must be integer
+    except ValueError:
+        return 32
+    if order <= 0:
+        return 32  # order value restrictions
+    if order in order_set:  # orders must not repeat
+        return 32
+    order_set.add(order)
+    if xml_inst.attrib['opcode'] not in opcodes:  # opcode must be valid
+        return 32
+    arg_types = opcodes[xml_inst.attrib['opcode']]  # expected types of arguments
+    if len(xml_inst) != len(arg_types):  # expected number of arguments for an instruction
+        return 32
+
+    # checking validity of argument elements
+    instr = Instruction(xml_inst.attrib['opcode'])
+    for j, xml_arg in zip(range(len(xml_inst)), xml_inst):
+        arg_gr = regex_arg_tag.fullmatch(xml_arg.tag)  # mandatory argument name format
+        if arg_gr is None:
+            return 32
+        arg_no = int(arg_gr.group(1))
+        if arg_no != (j + 1):  # argument number validity, must be in correct order, no missing numbers
+            return 32
+        if len(xml_arg.attrib) != 1:  # mandatory number of attributes (1)
+            return 32
+        if 'type' not in xml_arg.attrib.keys():  # mandatory attribute type
+            return 32
+        arg_type = xml_arg.attrib['type']
+        if arg_type not in types:  # type must be valid
+            return 32
+        # checking if supplied argument is expected for given instruction
+        if not check_argument_type(arg_type, arg_types[arg_no - 1]):
+            return 53
+        if not check_type_validity(arg_type, xml_arg.text):  # checking if value is of given type
+            return 32
+        arg_val = xml_arg.text
+        if arg_type == 'string' and arg_val is not None:  # sub decimal escapes for actual characters
+            arg_val = regex_dec_escapes.sub(replace_dec_escapes, arg_val)
+        instr.add_arg(arg_type, arg_val)
+    instr_arr.add(order, instr)
+    return 0
+
+
+# loads xml source document from given binary stream in a single pass, returns sorted InstructionArray
+# document is validated and converted incrementally, every instruction element is discarded once it is loaded,
+# first structural error is remembered and reported only after the whole document is known to be well-formed
+def load_program(source_stream):
+    instr_arr = InstructionArray()
+    order_set = set()  # set of order numbers that already occurred
+    error_code = 0
+    depth = 0  # depth of current element in document
+    xml_root = None
+    gc.disable()  # loading creates lots of acyclic objects, repeated garbage collection would only slow it down
+    try:
+        for event, element in Et.iterparse(source_stream, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if depth == 1:  # program element, its attributes are complete at its start
+                    xml_root = element
+                    error_code = check_program_element(xml_root)
+                continue
+            depth -= 1
+            if depth == 1:  # whole instruction element including its arguments is loaded
+                if error_code == 0:
+                    error_code = load_instruction(element, instr_arr, order_set)
+                xml_root.clear()  # discard already loaded instructions
+    except Et.ParseError:
+        raise InterpretExit(31)  # xml document not well-formed (syntax errors)
+    finally:
+        gc.enable()
+    if error_code != 0:
+        raise InterpretExit(error_code)
+    instr_arr.sort()
+    return instr_arr
+
+
+# checks whether frame is defined
+def frame_check(frame):
+    if frame is None:
+        raise InterpretExit(55)
+
+
+# detects repeated definition of a variable
+def var_def_check(frame, var_slot):
+    if frame.types[var_slot] is not None:
+        raise InterpretExit(52)
+
+
+# detects usage of an undefined variable
+def var_assign_check(frame, var_slot):
+    if frame.types[var_slot] is None:
+        raise InterpretExit(54)
+
+
+# retrieves value and type if given symbol is a variable else returns value and type of given symbol
+def safe_get_symb(symb_arg, frames):
+    if symb_arg.type != 'var':  # constants are already converted by compile pass
+        return symb_arg.val, symb_arg.type
+    if symb_arg.frame == GF:
+        frame = frames.gf
+    else:
+        frame = frames.get_frame(symb_arg.frame)
+    symb_value = frame.values[symb_arg.slot]
+    if symb_value is None:  # uninitialized or undefined variable
+        var_assign_check(frame, symb_arg.slot)
+        raise InterpretExit(56)
+    if symb_value.__class__ is StringBuilder:  # mutable string is never shared, python string is returned
+        return symb_value.text(), 'string'
+    return symb_value, frame.types[symb_arg.slot]
+
+
+# same as safe_get_symb, but string value of variable may be returned as StringBuilder (supports len and indexing)
+def safe_get_raw_symb(symb_arg, frames):
+    if symb_arg.type != 'var':  # constants are already converted by compile pass
+        return symb_arg.val, symb_arg.type
+    if symb_arg.frame == GF:
+        frame = frames.gf
+    else:
+        frame = frames.get_frame(symb_arg.frame)
+    symb_value = frame.values[symb_arg.slot]
+    if symb_value is None:  # uninitialized or undefined variable
+        var_assign_check(frame, symb_arg.slot)
+        raise InterpretExit(56)
+    return symb_value, frame.types[symb_arg.slot]
+
+
+# returns number of bytes given by value of --max-memory (number with optional unit suffix)
+def memory_size(text):
+    unit = text[-1] if text[-1] in memory_units else ''
+    return int(text[:len(text) - len(unit)]) * memory_units[unit]
+
+
+# returns approximate number of bytes held by given value of variable or stack item (bool and None are shared),
+# only characters of StringBuilder are counted, its cached text is created by reads (which are not accounted) and
+# it is held by variables it was moved to (which count it themselves)
+def value_size(value):
+    if value.__class__ is StringBuilder:
+        return sys.getsizeof(value.chars)
+    if value is None or value.__class__ is bool:
+        return 0
+    return sys.getsizeof(value)
+
+
+# returns approximate number of bytes held by value of given variable, variable is read without any checks
+# (0 if its frame does not exist)
+def variable_size(var_arg, frames):
+    if var_arg.frame == GF:
+        frame = frames.gf
+    elif var_arg.frame == LF:
+        frame = frames.lf
+    else:
+        frame = frames.tf
+    return 0 if frame is None else value_size(frame.values[var_arg.slot])
+
+
+# returns number of bytes of given frame without values of its variables
+def frame_size(frame):
+    return sys.getsizeof(frame) + sys.getsizeof(frame.values) + sys.getsizeof(frame.types)
+
+
+# returns number of bytes held by values of variables of given frame
+def frame_values_size(frame):
+    return sum([value_size(value) for value in frame.values])
+
+
+# ### end of function definitions ### #
+
+
+# ### INSTRUCTION HANDLERS ### #
+# every handler executes one instruction, handlers are looked up in dispatch table by integer opcode id
+# CREATEFRAME
+def exec_createframe(instr, machine):
+    machine.frames.create_frame()
+
+
+# PUSHFRAME
+def exec_pushframe(instr, machine):
+    machine.frames.lf_push()
+
+
+# POPFRAME
+def exec_popframe(instr, machine):
+    machine.frames.lf_pop()
+
+
+# DEFVAR var
+def exec_defvar(instr, machine):
+    machine.frames.ipp_defvar(instr.arg1)
+
+
+# MOVE var symb
+def exec_move(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    frames.ipp_move(instr.arg1, var1_value, var1_type)
+
+
+# PUSHS symb
+def exec_pushs(instr, machine):
+    var1_value, var1_type = safe_get_symb(instr.arg1, machine.frames)
+    machine.stack.ipp_pushs(var1_value, var1_type)
+
+
+# POPS var
+def exec_pops(instr, machine):
+    machine.stack.ipp_pops(instr.arg1, machine.frames)
+
+
+# ADD var symb symb
+def exec_add(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'int' or var2_type != 'int':  # operands must be int
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value + var2_value, 'int')
+
+
+# SUB var symb symb
+def exec_sub(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'int' or var2_type != 'int':  # operands must be int
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value - var2_value, 'int')
+
+
+# MUL var symb symb
+def exec_mul(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'int' or var2_type != 'int':  # operands must be int
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value * var2_value, 'int')
+
+
+# IDIV var symb symb
+def exec_idiv(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'int' or var2_type != 'int':  # operands must be int
+        raise InterpretExit(53)
+    if var2_value == 0:  # division by zero not allowed
+        raise InterpretExit(57)
+    frames.ipp_move(instr.arg1, var1_value // var2_value, 'int')
+
+
+# LT var symb symb
+def exec_lt(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type:  # operand types must be the same
+        raise InterpretExit(53)
+    if var1_type == 'nil' or var2_type == 'nil':
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value < var2_value, 'bool')
+
+
+# GT var symb symb
+def exec_gt(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type:  # operand types must be the same
+        raise InterpretExit(53)
+    if var1_type == 'nil' or var2_type == 'nil':
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value > var2_value, 'bool')
+
+
+# EQ var symb symb
+def exec_eq(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type:  # operand types must be the same
+        if var1_type != 'nil' and var2_type != 'nil':
+            raise InterpretExit(53)
+        result = False  # operands types may be different if one is nil, always not equal
+    else:
+        result = (var1_value == var2_value)
+    frames.ipp_move(instr.arg1, result, 'bool')
+
+
+# AND var symb symb
+def exec_and(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'bool' or var2_type != 'bool':  # operands must be bool
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value and var2_value, 'bool')
+
+
+# OR var symb symb
+def exec_or(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'bool' or var2_type != 'bool':  # operands must be bool
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value or var2_value, 'bool')
+
+
+# NOT var symb
+def exec_not(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    if var1_type != 'bool':  # operand must be bool
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, not var1_value, 'bool')
+
+
+# INT2CHAR var symb
+def exec_int2char(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    if var1_type != 'int':  # operand must be int
+        raise InterpretExit(53)
+    try:
+        result = chr(var1_value)
+    except ValueError:  # negative int is invalid
+        raise InterpretExit(58)
+    frames.ipp_move(instr.arg1, result, 'string')
+
+
+# STRI2INT var symb symb
+def exec_stri2int(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_raw_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'string' or var2_type != 'int':  # operands must be string and int
+        raise InterpretExit(53)
+    if var2_value < 0 or var2_value >= len(var1_value):  # index must not be out of bounds
+        raise InterpretExit(58)
+    frames.ipp_move(instr.arg1, ord(var1_value[var2_value]), 'int')
+
+
+# READ var type
+def exec_read(instr, machine):
+    read_type = instr.arg2.val
+    read_value = machine.input_reader.read_line()
+    if read_value is None:  # no input, reads nil
+        read_value = read_type = 'nil'
+    else:
+        if read_type == 'int':
+            try:
+                read_value = int(read_value)  # read int value
+            except ValueError:  # invalid int value, reads nil
+                read_value = read_type = 'nil'
+        elif read_type == 'bool':
+            read_value = (read_value.lower() == 'true')  # bool is True if value is 'true' else False
+    machine.frames.ipp_move(instr.arg1, read_value, read_type)
+
+
+# WRITE symb
+def exec_write(instr, machine):
+    var1_value, var1_type = safe_get_symb(instr.arg1, machine.frames)
+    machine.output.write(output_repr(var1_value, var1_type))
+
+
+# DPRINT symb
+def exec_dprint(instr, machine):
+    var1_value, var1_type = safe_get_symb(instr.arg1, machine.frames)
+    machine.error_output.write(output_repr(var1_value, var1_type))
+
+
+# CONCAT var symb symb
+def exec_concat(instr, machine):
+    frames = machine.frames
+    if instr.dest_is_arg2:  # appending to the destination variable, its value is changed in place
+        var1_value, var1_type = safe_get_raw_symb(instr.arg2, frames)
+        var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+        if var1_type != 'string' or var2_type != 'string':  # operands must be string
+            raise InterpretExit(53)
+        if var1_value.__class__ is not StringBuilder:
+            var1_value = StringBuilder(var1_value)
+            frames.ipp_move(instr.arg1, var1_value, 'string')
+        var1_value.extend(var2_value)
+        return
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'string' or var2_type != 'string':  # operands must be string
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, var1_value + var2_value, 'string')
+
+
+# STRLEN var symb
+def exec_strlen(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_raw_symb(instr.arg2, frames)
+    if var1_type != 'string':  # operand must be string
+        raise InterpretExit(53)
+    frames.ipp_move(instr.arg1, len(var1_value), 'int')
+
+
+# GETCHAR var symb symb
+def exec_getchar(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_raw_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'string' or var2_type != 'int':  # operands must be string and int
+        raise InterpretExit(53)
+    if var2_value < 0 or var2_value >= len(var1_value):  # index must not be out of bounds
+        raise InterpretExit(58)
+    frames.ipp_move(instr.arg1, var1_value[var2_value], 'string')
+
+
+# SETCHAR var symb symb
+def exec_setchar(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    dest_value, dest_type = safe_get_raw_symb(instr.arg1, frames)
+    # operands must be string, int and string
+    if var1_type != 'int' or var2_type != 'string' or dest_type != 'string':
+        raise InterpretExit(53)
+    # index must not be out of bounds, source must not be empty
+    if var1_value < 0 or var1_value >= len(dest_value) or len(var2_value) == 0:
+        raise InterpretExit(58)
+    # set value of char in dest at given index to first char in source (dest is changed in place)
+    if dest_value.__class__ is not StringBuilder:
+        dest_value = StringBuilder(dest_value)
+        frames.ipp_move(instr.arg1, dest_value, 'string')
+    dest_value.set_char(var1_value, var2_value[0])
+
+
+# TYPE var symb
+def exec_type(instr, machine):
+    frames = machine.frames
+    if instr.arg2.type == 'var':
+        dyn_type = frames.get_var_type(instr.arg2)
+    else:
+        dyn_type = instr.arg2.type
+    frames.ipp_move(instr.arg1, dyn_type, 'string')
+
+
+# DEFVARMOVE var symb (internal)
+def exec_defvarmove(instr, machine):
+    frames = machine.frames
+    frames.ipp_defvar(instr.arg1)
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    frames.ipp_move(instr.arg1, var1_value, var1_type)
+
+
+# CHECKVAR var (internal)
+def exec_checkvar(instr, machine):
+    safe_get_symb(instr.arg1, machine.frames)
+
+
+# LTJUMP var symb symb label (internal), LT followed by jump testing its result
+def exec_ltjump(instr, machine):
+    frames = machine.frames
+    ir = machine.ir
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type or var1_type == 'nil':  # operand types must be the same and not nil
+        raise InterpretExit(53)
+    result = var1_value < var2_value
+    frames.ipp_move(instr.arg1, result, 'bool')
+    ir.label_use_check(instr.arg4)
+    if result == instr.jump_when:
+        ir.curr_i = instr.arg4.target
+
+
+# GTJUMP var symb symb label (internal), GT followed by jump testing its result
+def exec_gtjump(instr, machine):
+    frames = machine.frames
+    ir = machine.ir
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type or var1_type == 'nil':  # operand types must be the same and not nil
+        raise InterpretExit(53)
+    result = var1_value > var2_value
+    frames.ipp_move(instr.arg1, result, 'bool')
+    ir.label_use_check(instr.arg4)
+    if result == instr.jump_when:
+        ir.curr_i = instr.arg4.target
+
+
+# EQJUMP var symb symb label (internal), EQ followed by jump testing its result
+def exec_eqjump(instr, machine):
+    frames = machine.frames
+    ir = machine.ir
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type:  # operand types must be the same
+        if var1_type != 'nil' and var2_type != 'nil':
+            raise InterpretExit(53)
+        result = False  # operands types may be different if one is nil, always not equal
+    else:
+        result = (var1_value == var2_value)
+    frames.ipp_move(instr.arg1, result, 'bool')
+    ir.label_use_check(instr.arg4)
+    if result == instr.jump_when:
+        ir.curr_i = instr.arg4.target
+
+
+# ADDJUMP var symb symb label symb (internal), ADD followed by jump comparing its result with symb
+def exec_addjump(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'int' or var2_type != 'int':  # operands must be int
+        raise InterpretExit(53)
+    result = var1_value + var2_value
+    frames.ipp_move(instr.arg1, result, 'int')
+    jump_if_equal(instr, result, machine)
+
+
+# SUBJUMP var symb symb label symb (internal), SUB followed by jump comparing its result with symb
+def exec_subjump(instr, machine):
+    frames = machine.frames
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != 'int' or var2_type != 'int':  # operands must be int
+        raise InterpretExit(53)
+    result = var1_value - var2_value
+    frames.ipp_move(instr.arg1, result, 'int')
+    jump_if_equal(instr, result, machine)
+
+
+# second half of ADDJUMP and SUBJUMP, compares int result with symb and jumps (JUMPIFEQ or JUMPIFNEQ semantics)
+def jump_if_equal(instr, result, machine):
+    ir = machine.ir
+    ir.label_use_check(instr.arg4)
+    var_value, var_type = safe_get_symb(instr.arg5, machine.frames)
+    if var_type != 'int':  # operands types must be the same
+        if var_type != 'nil':  # except when one is nil
+            raise InterpretExit(53)
+        equal = False
+    else:
+        equal = (result == var_value)
+    if equal == instr.jump_when:
+        ir.curr_i = instr.arg4.target
+
+
+# returns value of symbol proven by type inference (variable is in global frame, it is initialized)
+def gf_value(symb_arg, values):
+    if symb_arg.type == 'var':
+        return values[symb_arg.slot]
+    return symb_arg.val
+
+
+# FASTADD var symb symb (internal), ADD of proven int operands into defined global variable
+def exec_fastadd(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    values[instr.arg1.slot] = gf_value(instr.arg2, values) + gf_value(instr.arg3, values)
+    frames.gf.types[instr.arg1.slot] = 'int'
+
+
+# FASTSUB var symb symb (internal), SUB of proven int operands into defined global variable
+def exec_fastsub(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    values[instr.arg1.slot] = gf_value(instr.arg2, values) - gf_value(instr.arg3, values)
+    frames.gf.types[instr.arg1.slot] = 'int'
+
+
+# FASTMUL var symb symb (internal), MUL of proven int operands into defined global variable
+def exec_fastmul(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    values[instr.arg1.slot] = gf_value(instr.arg2, values) * gf_value(instr.arg3, values)
+    frames.gf.types[instr.arg1.slot] = 'int'
+
+
+# FASTLT var symb symb (internal), LT of proven int or bool operands of the same type into defined global variable
+def exec_fastlt(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    values[instr.arg1.slot] = gf_value(instr.arg2, values) < gf_value(instr.arg3, values)
+    frames.gf.types[instr.arg1.slot] = 'bool'
+
+
+# FASTGT var symb symb (internal), GT of proven int or bool operands of the same type into defined global variable
+def exec_fastgt(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    values[instr.arg1.slot] = gf_value(instr.arg2, values) > gf_value(instr.arg3, values)
+    frames.gf.types[instr.arg1.slot] = 'bool'
+
+
+# FASTEQ var symb symb (internal), EQ of proven int or bool operands of the same type into defined global variable
+def exec_fasteq(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    values[instr.arg1.slot] = gf_value(instr.arg2, values) == gf_value(instr.arg3, values)
+    frames.gf.types[instr.arg1.slot] = 'bool'
+
+
+# FASTCONCAT var symb symb (internal), CONCAT of proven string operands into defined global variable
+def exec_fastconcat(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    var2_value = gf_value(instr.arg3, values)
+    if var2_value.__class__ is StringBuilder:
+        var2_value = var2_value.text()
+    if instr.dest_is_arg2:  # appending to the destination variable, its value is changed in place
+        var1_value = values[instr.arg1.slot]
+        if var1_value.__class__ is not StringBuilder:
+            var1_value = values[instr.arg1.slot] = StringBuilder(var1_value)
+        var1_value.extend(var2_value)
+        return
+    var1_value = gf_value(instr.arg2, values)
+    if var1_value.__class__ is StringBuilder:
+        var1_value = var1_value.text()
+    values[instr.arg1.slot] = var1_value + var2_value
+    frames.gf.types[instr.arg1.slot] = 'string'
+
+
+# FASTJUMPIFEQ label symb symb (internal), JUMPIFEQ to defined label with proven operands of the same type
+def exec_fastjumpifeq(instr, machine):
+    values = machine.frames.gf.values
+    if gf_value(instr.arg2, values) == gf_value(instr.arg3, values):
+        machine.ir.curr_i = instr.arg1.target
+
+
+# FASTJUMPIFNEQ label symb symb (internal), JUMPIFNEQ to defined label with proven operands of the same type
+def exec_fastjumpifneq(instr, machine):
+    values = machine.frames.gf.values
+    if gf_value(instr.arg2, values) != gf_value(instr.arg3, values):
+        machine.ir.curr_i = instr.arg1.target
+
+
+# FASTLTJUMP var symb symb label (internal), LTJUMP with proven operands, destination and label
+def exec_fastltjump(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    result = gf_value(instr.arg2, values) < gf_value(instr.arg3, values)
+    values[instr.arg1.slot] = result
+    frames.gf.types[instr.arg1.slot] = 'bool'
+    if result == instr.jump_when:
+        machine.ir.curr_i = instr.arg4.target
+
+
+# FASTGTJUMP var symb symb label (internal), GTJUMP with proven operands, destination and label
+def exec_fastgtjump(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    result = gf_value(instr.arg2, values) > gf_value(instr.arg3, values)
+    values[instr.arg1.slot] = result
+    frames.gf.types[instr.arg1.slot] = 'bool'
+    if result == instr.jump_when:
+        machine.ir.curr_i = instr.arg4.target
+
+
+# FASTEQJUMP var symb symb label (internal), EQJUMP with proven operands, destination and label
+def exec_fasteqjump(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    result = gf_value(instr.arg2, values) == gf_value(instr.arg3, values)
+    values[instr.arg1.slot] = result
+    frames.gf.types[instr.arg1.slot] = 'bool'
+    if result == instr.jump_when:
+        machine.ir.curr_i = instr.arg4.target
+
+
+# FASTADDJUMP var symb symb label symb (internal), ADDJUMP with proven operands, destination and label
+def exec_fastaddjump(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    result = gf_value(instr.arg2, values) + gf_value(instr.arg3, values)
+    values[instr.arg1.slot] = result
+    frames.gf.types[instr.arg1.slot] = 'int'
+    if (result == gf_value(instr.arg5, values)) == instr.jump_when:
+        machine.ir.curr_i = instr.arg4.target
+
+
+# FASTSUBJUMP var symb symb label symb (internal), SUBJUMP with proven operands, destination and label
+def exec_fastsubjump(instr, machine):
+    frames = machine.frames
+    values = frames.gf.values
+    result = gf_value(instr.arg2, values) - gf_value(instr.arg3, values)
+    values[instr.arg1.slot] = result
+    frames.gf.types[instr.arg1.slot] = 'int'
+    if (result == gf_value(instr.arg5, values)) == instr.jump_when:
+        machine.ir.curr_i = instr.arg4.target
+
+
+# LABEL label (labels are collected by prerun), BREAK
+def exec_nop(instr, machine):
+    pass
+
+
+# JUMP label
+def exec_jump(instr, machine):
+    machine.ir.ipp_jump(instr.arg1)
+
+
+# JUMPIFEQ label symb symb
+def exec_jumpifeq(instr, machine):
+    frames = machine.frames
+    ir = machine.ir
+    ir.label_use_check(instr.arg1)  # check label existence
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type:  # operands types must be the same
+        if var1_type != 'nil' and var2_type != 'nil':  # except when one is nil
+            raise InterpretExit(53)
+    elif var1_value == var2_value:  # jump if values are equal
+        ir.ipp_jump(instr.arg1)
+
+
+# JUMPIFNEQ label symb symb
+def exec_jumpifneq(instr, machine):
+    frames = machine.frames
+    ir = machine.ir
+    ir.label_use_check(instr.arg1)  # check label existence
+    var1_value, var1_type = safe_get_symb(instr.arg2, frames)
+    var2_value, var2_type = safe_get_symb(instr.arg3, frames)
+    if var1_type != var2_type:  # operands types must be the same
+        if var1_type != 'nil' and var2_type != 'nil':  # except when one is nil
+            raise InterpretExit(53)
+        ir.ipp_jump(instr.arg1)  # not equal operand types -> jump
+    elif var1_value != var2_value:  # jump if values are not equal
+        ir.ipp_jump(instr.arg1)
+
+
+# CALL label
+def exec_call(instr, machine):
+    machine.ir.ipp_call(instr.arg1)
+
+
+# RETURN
+def exec_return(instr, machine):
+    machine.ir.ipp_return()
+
+
+# EXIT symb
+def exec_exit(instr, machine):
+    var1_value, var1_type = safe_get_symb(instr.arg1, machine.frames)
+    if var1_type != 'int':
+        raise InterpretExit(53)
+    if var1_value < 0 or var1_value > 49:  # exit code must be in this range
+        raise InterpretExit(57)
+    raise ProgramExit(var1_value)
+
+
+# dict of instruction handlers
+handlers = {'MOVE': exec_move,
+            'CREATEFRAME': exec_createframe,
+            'PUSHFRAME': exec_pushframe,
+            'POPFRAME': exec_popframe,
+            'DEFVAR': exec_defvar,
+            'CALL': exec_call,
+            'RETURN': exec_return,
+            'PUSHS': exec_pushs,
+            'POPS': exec_pops,
+            'ADD': exec_add,
+            'SUB': exec_sub,
+            'MUL': exec_mul,
+            'IDIV': exec_idiv,
+            'LT': exec_lt,
+            'GT': exec_gt,
+            'EQ': exec_eq,
+            'AND': exec_and,
+            'OR': exec_or,
+            'NOT': exec_not,
+            'INT2CHAR': exec_int2char,
+            'STRI2INT': exec_stri2int,
+            'READ': exec_read,
+            'WRITE': exec_write,
+            'CONCAT': exec_concat,
+            'STRLEN': exec_strlen,
+            'GETCHAR': exec_getchar,
+            'SETCHAR': exec_setchar,
+            'TYPE': exec_type,
+            'LABEL': exec_nop,
+            'JUMP': exec_jump,
+            'JUMPIFEQ': exec_jumpifeq,
+            'JUMPIFNEQ': exec_jumpifneq,
+            'EXIT': exec_exit,
+            'DPRINT': exec_dprint,
+            'BREAK': exec_nop,
+            'DEFVARMOVE': exec_defvarmove,
+            'CHECKVAR': exec_checkvar,
+            'LTJUMP': exec_ltjump,
+            'GTJUMP': exec_gtjump,
+            'EQJUMP': exec_eqjump,
+            'ADDJUMP': exec_addjump,
+            'SUBJUMP': exec_subjump,
+            'FASTADD': exec_fastadd,
+            'FASTSUB': exec_fastsub,
+            'FASTMUL': exec_fastmul,
+            'FASTLT': exec_fastlt,
+            'FASTGT': exec_fastgt,
+            'FASTEQ': exec_fasteq,
+            'FASTCONCAT': exec_fastconcat,
+            'FASTJUMPIFEQ': exec_fastjumpifeq,
+            'FASTJUMPIFNEQ': exec_fastjumpifneq,
+            'FASTLTJUMP': exec_fastltjump,
+            'FASTGTJUMP': exec_fastgtjump,
+            'FASTEQJUMP': exec_fasteqjump,
+            'FASTADDJUMP': exec_fastaddjump,
+            'FASTSUBJUMP': exec_fastsubjump,
+            'TAILCALL': exec_jump,  # TAILCALL label (internal), CALL which does not save return address
+            }
+
+# dispatch table, list of handlers indexed by integer opcode id
+dispatch_table = [handlers[opcode] for opcode in opcode_ids]
+
+# ### end of instruction handlers ### #
+
+
+# ### OPTIMIZER ### #
+# instructions which write value into the variable in their first argument when they succeed
+writing_opcodes = {'MOVE', 'POPS', 'ADD', 'SUB', 'MUL', 'IDIV', 'LT', 'GT', 'EQ', 'AND', 'OR', 'NOT', 'INT2CHAR',
+                   'STRI2INT', 'READ', 'CONCAT', 'STRLEN', 'GETCHAR', 'SETCHAR', 'TYPE', 'DEFVARMOVE', 'FASTADD',
+                   'FASTSUB', 'FASTMUL', 'FASTLT', 'FASTGT', 'FASTEQ', 'FASTCONCAT'}
+
+
+# peephole optimization of pre-decoded program, returns number of eliminated instructions
+# instruction following a non-LABEL and non-CALL instruction can only be reached from it, so such pairs are rewritten,
+# LABEL instructions are removed at the end and jump targets and given dict of labels are moved accordingly,
+# stack_limit is max depth of ipp stack (None if stack is unbounded)
+def optimize(instr_arr, label_dict, stack_limit):
+    program = [instr_arr[inst_num] for inst_num in range(1, len(instr_arr) + 1)]
+    inst_count = len(program)
+    program = optimize_pairs(program, stack_limit)
+    resolve_labels(program)
+    program = optimize_jumps(program)
+    label_dict.update(resolve_labels(program))
+    program, instr_arr.end_origin = remove_labels(program, label_dict)
+    instr_arr.set_program(program)
+    return inst_count - len(program)
+
+
+# rewrites pairs of adjacent instructions and moves of variable to itself (PUSHS and POPS are kept if stack is bounded,
+# PUSHS onto full stack is an error)
+def optimize_pairs(program, stack_limit):
+    result = []
+    for instr in program:
+        prev = result[-1] if result else None
+        # PUSHS symb + POPS var -> MOVE var symb
+        if instr.opcode == 'POPS' and prev is not None and prev.opcode == 'PUSHS' and stack_limit is None:
+            instr = prev.rewrite('MOVE', [instr.arg1, prev.arg1], [instr])
+            result.pop()
+            prev = result[-1] if result else None
+        # DEFVAR var + MOVE var const -> DEFVARMOVE var const
+        if instr.opcode == 'MOVE' and instr.arg2.type != 'var' and prev is not None and prev.opcode == 'DEFVAR' \
+                and same_var(prev.arg1, instr.arg1):
+            result[-1] = prev.rewrite('DEFVARMOVE', [instr.arg1, instr.arg2], [instr])
+            continue
+        # MOVE var var -> nothing if previous instruction has just written the variable, else only checks variable
+        if instr.opcode == 'MOVE' and same_var(instr.arg1, instr.arg2):
+            if prev is not None and prev.opcode in writing_opcodes and same_var(prev.arg1, instr.arg1):
+                prev.absorb(instr.sources(), False)
+                continue
+            instr = instr.rewrite('CHECKVAR', [instr.arg1])
+        result.append(instr)
+    return result
+
+
+# fuses compare or arithmetic instruction followed by conditional jump testing its result into superinstruction,
+# returns number of fused pairs (must be done while LABEL instructions are still present in the program),
+# given dict of labels is updated to moved LABEL instructions
+def fuse_instructions(instr_arr, label_dict):
+    program = [instr_arr[inst_num] for inst_num in range(1, len(instr_arr) + 1)]
+    result = []
+    for instr in program:
+        prev = result[-1] if result else None
+        fused = None
+        if prev is not None and instr.opcode in ('JUMPIFEQ', 'JUMPIFNEQ'):
+            fused = fuse_pair(prev, instr)
+        if fused is not None:
+            result[-1] = fused
+        else:
+            result.append(instr)
+    if len(result) == len(program):
+        return 0
+    label_dict.update(resolve_labels(result))
+    instr_arr.set_program(result)
+    return len(program) - len(result)
+
+
+# replaces CALL followed by RETURN (only labels may be between them) by TAILCALL, which jumps to called label without
+# saving return address (called label then returns directly to the caller), returns number of replaced calls
+def tail_calls(instr_arr):
+    inst_count = len(instr_arr)
+    replaced = 0
+    for inst_num in range(1, inst_count + 1):
+        instr = instr_arr[inst_num]
+        if instr.opcode != 'CALL':
+            continue
+        next_num = inst_num + 1
+        while next_num <= inst_count and instr_arr[next_num].opcode == 'LABEL':
+            next_num += 1
+        if next_num <= inst_count and instr_arr[next_num].opcode == 'RETURN':
+            instr_arr.root[inst_num] = instr.rewrite('TAILCALL', [instr.arg1])
+            replaced += 1
+    return replaced
+
+
+# returns superinstruction replacing given instruction and conditional jump following it, None if they cannot be fused
+def fuse_pair(prev, jump):
+    # operand of jump which is not the result of previous instruction
+    if same_var(jump.arg2, prev.arg1):
+        other = jump.arg3
+    elif same_var(jump.arg3, prev.arg1):
+        other = jump.arg2
+    else:
+        return None
+    if prev.opcode in ('LT', 'GT', 'EQ'):
+        if other.type != 'bool':  # result is compared with bool constant
+            return None
+        fused = prev.rewrite(prev.opcode + 'JUMP', [prev.arg1, prev.arg2, prev.arg3, jump.arg1], [jump])
+        fused.jump_when = other.val if jump.opcode == 'JUMPIFEQ' else not other.val
+        return fused
+    if prev.opcode in ('ADD', 'SUB'):
+        fused = prev.rewrite(prev.opcode + 'JUMP', [prev.arg1, prev.arg2, prev.arg3, jump.arg1, other], [jump])
+        fused.jump_when = jump.opcode == 'JUMPIFEQ'
+        return fused
+    return None
+
+
+# sets targets of defined labels to current positions of their LABEL instructions, returns dict of the labels
+def resolve_labels(program):
+    label_dict = {}
+    for inst_num, instr in zip(range(1, len(program) + 1), program):
+        if instr.opcode == 'LABEL':
+            label_dict[instr.arg1.val] = inst_num
+    for instr in program:
+        for arg in instr.args.values():
+            if arg.type == 'label' and arg.target is not None:
+                arg.target = label_dict[arg.val]
+    return label_dict
+
+
+# removes unconditional jumps to the next instruction (only labels are between jump and its target),
+# removed jump is absorbed by the LABEL instruction following it
+def optimize_jumps(program):
+    result = []
+    removed = []  # source instructions of removed jumps which are not absorbed yet
+    for inst_num, instr in zip(range(1, len(program) + 1), program):
+        if instr.opcode == 'JUMP' and instr.arg1.target is not None and instr.arg1.target > inst_num:
+            following = program[inst_num:instr.arg1.target]  # instructions after jump up to its target
+            if all(following_instr.opcode == 'LABEL' for following_instr in following):
+                removed += instr.sources()
+                continue
+        if removed:
+            instr.absorb(removed, True)
+            removed = []
+        result.append(instr)
+    return result
+
+
+# removes LABEL instructions, jump to label continues with the first instruction after it, returns the rest of program
+# and source instructions removed from the end of program (others are absorbed by the instruction following them),
+# labels of given dict of labels are moved like jump targets
+def remove_labels(program, label_dict):
+    # positions of instructions in the new program, kept[i] - 1 is the number of kept instructions before position i
+    kept = [1] * (len(program) + 2)
+    inst_num = 1
+    for old_num, instr in zip(range(1, len(program) + 1), program):
+        kept[old_num] = inst_num
+        if instr.opcode != 'LABEL':
+            inst_num += 1
+    kept[len(program) + 1] = inst_num
+    for label_name, target in label_dict.items():
+        label_dict[label_name] = kept[target + 1] - 1
+    result = []
+    removed = []  # source instructions of removed labels which are not absorbed yet
+    for instr in program:
+        if instr.opcode == 'LABEL':
+            removed += instr.sources()
+            continue
+        for arg in instr.args.values():
+            if arg.type == 'label' and arg.target is not None:
+                arg.target = kept[arg.target + 1] - 1  # execution continues after the target
+        if removed:
+            instr.absorb(removed, True)
+            removed = []
+        result.append(instr)
+    return result, removed
+
+# ### end of optimizer ### #
+
+
+# ### TYPE INFERENCE ### #
+# state of global variable is a set of its possible types: 'int', 'bool', 'string', 'nil', '' (defined, but
+# uninitialized) and 'undef' (not defined), state of the program is dict of slot -> state of variables whose types
+# are needed (see needed_slots), variables of local and temporary frames are not analysed
+initialized_types = frozenset(('int', 'bool', 'string', 'nil'))
+defined_types = initialized_types | {''}
+single_types = {value_type: frozenset((value_type,)) for value_type in initialized_types}  # sets with one type
+int_types = single_types['int']
+bool_types = single_types['bool']
+string_types = single_types['string']
+
+# dict of argument kinds of all opcodes (including internal ones)
+argument_kinds = dict(opcodes, **internal_opcodes)
+
+# types of variables which instructions read without error, dict of opcode -> dict of argument number -> types
+# (variables in symbol arguments which are not listed must be initialized)
+required_types = {'ADD': {2: int_types, 3: int_types},
+                  'SUB': {2: int_types, 3: int_types},
+                  'MUL': {2: int_types, 3: int_types},
+                  'IDIV': {2: int_types, 3: int_types},
+                  'LT': {2: initialized_types - {'nil'}, 3: initialized_types - {'nil'}},
+                  'GT': {2: initialized_types - {'nil'}, 3: initialized_types - {'nil'}},
+                  'AND': {2: bool_types, 3: bool_types},
+                  'OR': {2: bool_types, 3: bool_types},
+                  'NOT': {2: bool_types},
+                  'INT2CHAR': {2: int_types},
+                  'STRI2INT': {2: string_types, 3: int_types},
+                  'CONCAT': {2: string_types, 3: string_types},
+                  'STRLEN': {2: string_types},
+                  'GETCHAR': {2: string_types, 3: int_types},
+                  'SETCHAR': {1: string_types, 2: int_types, 3: string_types},
+                  'TYPE': {2: defined_types},
+                  'CHECKVAR': {1: initialized_types},
+                  'LTJUMP': {2: initialized_types - {'nil'}, 3: initialized_types - {'nil'}},
+                  'GTJUMP': {2: initialized_types - {'nil'}, 3: initialized_types - {'nil'}},
+                  'ADDJUMP': {2: int_types, 3: int_types, 5: int_types | {'nil'}},
+                  'SUBJUMP': {2: int_types, 3: int_types, 5: int_types | {'nil'}},
+                  }
+
+# types written into variable in argument 1 (MOVE, DEFVARMOVE and READ depend on their arguments)
+result_types = {'DEFVAR': frozenset(('',)),
+                'POPS': initialized_types,
+                'ADD': int_types, 'SUB': int_types, 'MUL': int_types, 'IDIV': int_types, 'STRI2INT': int_types,
+                'STRLEN': int_types, 'ADDJUMP': int_types, 'SUBJUMP': int_types,
+                'LT': bool_types, 'GT': bool_types, 'EQ': bool_types, 'AND': bool_types, 'OR': bool_types,
+                'NOT': bool_types, 'LTJUMP': bool_types, 'GTJUMP': bool_types, 'EQJUMP': bool_types,
+                'INT2CHAR': string_types, 'CONCAT': string_types, 'GETCHAR': string_types, 'SETCHAR': string_types,
+                'TYPE': string_types,
+                }
+
+# instructions writing variable in argument 1
+destination_opcodes = set(result_types) | {'MOVE', 'READ', 'DEFVARMOVE'}
+
+# fast variants of instructions with types of operands which must be proven
+fast_opcodes = {'ADD': ('FASTADD', ('int',)),
+                'SUB': ('FASTSUB', ('int',)),
+                'MUL': ('FASTMUL', ('int',)),
+                'LT': ('FASTLT', ('int', 'bool')),
+                'GT': ('FASTGT', ('int', 'bool')),
+                'EQ': ('FASTEQ', ('int', 'bool')),
+                'CONCAT': ('FASTCONCAT', ('string',)),
+                'JUMPIFEQ': ('FASTJUMPIFEQ', ('int', 'bool')),
+                'JUMPIFNEQ': ('FASTJUMPIFNEQ', ('int', 'bool')),
+                'LTJUMP': ('FASTLTJUMP', ('int', 'bool')),
+                'GTJUMP': ('FASTGTJUMP', ('int', 'bool')),
+                'EQJUMP': ('FASTEQJUMP', ('int', 'bool')),
+                'ADDJUMP': ('FASTADDJUMP', ('int',)),
+                'SUBJUMP': ('FASTSUBJUMP', ('int',)),
+                }
+
+
+# dataflow analysis of types of global variables over basic blocks of the program, instructions whose operand types
+# and destination are proven are replaced by their fast variants without runtime checks, states at starts of blocks
+# keep only variables needed there (so the analysis is not proportional to blocks times global variables),
+# returns number of replaced instructions (done before optimization and tail calls, which keep fast instructions valid)
+def infer_types(instr_arr):
+    inst_count = len(instr_arr)
+    if inst_count == 0:
+        return 0
+    leaders, return_sites = basic_blocks(instr_arr)
+    block_ends = dict(zip(leaders, leaders[1:] + [inst_count + 1]))  # leader -> first instruction after block
+    successors = {leader: instruction_successors(end - 1, instr_arr[end - 1], return_sites, inst_count)
+                  for leader, end in block_ends.items()}  # leader -> leaders of blocks executed after block
+    needed = needed_slots(instr_arr, block_ends, successors)
+    entry_states = {1: dict.fromkeys(needed[1], frozenset(('undef',)))}  # states at starts of reached blocks
+    worklist = [1]
+    while worklist:
+        leader = worklist.pop()
+        state = dict(entry_states[leader])
+        for inst_num in range(leader, block_ends[leader]):
+            if not infer_instruction(instr_arr[inst_num], state):
+                break
+        else:
+            for successor in successors[leader]:
+                merged = join_states(entry_states.get(successor), state, needed[successor])
+                if merged != entry_states.get(successor):
+                    entry_states[successor] = merged
+                    worklist.append(successor)
+    replaced = 0
+    for leader, entry_state in entry_states.items():
+        if not any(instr_arr[inst_num].opcode in fast_opcodes for inst_num in range(leader, block_ends[leader])):
+            continue  # block without instructions having fast variants
+        state = dict(entry_state)
+        for inst_num in range(leader, block_ends[leader]):
+            instr = instr_arr[inst_num]
+            fast_opcode = select_fast_opcode(instr, state)
+            if fast_opcode is not None:
+                fast_instr = instr.rewrite(fast_opcode, list(instr.args.values()))
+                fast_instr.jump_when = instr.jump_when
+                instr_arr.root[inst_num] = fast_instr
+                replaced += 1
+            if not infer_instruction(instr, state):
+                break
+    return replaced
+
+
+# returns sorted list of first instructions of basic blocks and list of instructions following CALL instructions,
+# blocks are split at labels, jumps, calls, returns and exits and at jump targets
+def basic_blocks(instr_arr):
+    inst_count = len(instr_arr)
+    leaders = {1}
+    return_sites = []
+    for inst_num in range(1, inst_count + 1):
+        instr = instr_arr[inst_num]
+        if instr.opcode == 'LABEL':
+            leaders.add(inst_num)
+        elif instr.label_arg is not None or instr.opcode in ('RETURN', 'EXIT'):
+            leaders.add(inst_num + 1)
+            if instr.label_arg is not None and instr.label_arg.target is not None:
+                leaders.add(instr.label_arg.target + 1)  # execution continues after the target
+            if instr.opcode == 'CALL' and instr.label_arg.target is not None:
+                return_sites.append(inst_num + 1)
+    return_sites = [inst_num for inst_num in return_sites if inst_num <= inst_count]
+    return sorted(inst_num for inst_num in leaders if inst_num <= inst_count), return_sites
+
+
+# returns list of instructions which can be executed after given instruction
+def instruction_successors(inst_num, instr, return_sites, inst_count):
+    if instr.opcode == 'EXIT':
+        return []
+    if instr.opcode == 'RETURN':  # return address may be after any call
+        return return_sites
+    successors = []
+    if instr.opcode not in ('JUMP', 'CALL', 'TAILCALL'):
+        successors.append(inst_num + 1)
+    if instr.opcode != 'LABEL' and instr.label_arg is not None and instr.label_arg.target is not None:
+        successors.append(instr.label_arg.target + 1)
+    return [successor for successor in successors if successor <= inst_count]
+
+
+# returns dict of leader -> set of slots of global variables needed at the start of block (backward liveness analysis):
+# variables read by instructions having fast variants or moved into another global variable before they are written
+# in the block or in blocks executed after it, other variables are not tracked by type inference (writes of a variable
+# set its whole state, so its state before the write is not needed)
+def needed_slots(instr_arr, block_ends, successors):
+    predecessors = {leader: [] for leader in block_ends}
+    for leader, block_successors in successors.items():
+        for successor in block_successors:
+            predecessors[successor].append(leader)
+    read = {}  # leader -> slots read in block before they are written
+    written = {}  # leader -> slots written in block
+    for leader, end in block_ends.items():
+        block_read = set()
+        block_written = set()
+        for inst_num in range(end - 1, leader - 1, -1):
+            instr = instr_arr[inst_num]
+            dest_slot = written_slot(instr)
+            if dest_slot is not None:
+                block_read.discard(dest_slot)
+                block_written.add(dest_slot)
+            block_read.update(read_slots(instr))
+        read[leader] = block_read
+        written[leader] = block_written
+    needed = {leader: set(block_read) for leader, block_read in read.items()}
+    worklist = [(leader, block_read) for leader, block_read in read.items() if block_read]  # newly needed slots
+    while worklist:
+        leader, added = worklist.pop()
+        for predecessor in predecessors[leader]:
+            new_slots = added - written[predecessor] - needed[predecessor]
+            if new_slots:
+                needed[predecessor] |= new_slots
+                worklist.append((predecessor, new_slots))
+    return needed
+
+
+# returns slot of global variable written by instruction, None if it does not write a global variable
+def written_slot(instr):
+    if instr.opcode in destination_opcodes and instr.arg1.frame == GF:
+        return instr.arg1.slot
+    return None
+
+
+# returns list of slots of global variables whose types are needed by instruction (operands and destination of
+# instruction having fast variant, source of move between global variables)
+def read_slots(instr):
+    if instr.opcode in fast_opcodes:
+        args = (instr.arg1, instr.arg2, instr.arg3, instr.arg5)
+    elif instr.opcode in ('MOVE', 'DEFVARMOVE'):
+        args = (instr.arg2,)
+    else:
+        return []
+    return [arg.slot for arg in args if arg is not None and arg.type == 'var' and arg.frame == GF]
+
+
+# returns state merged from two states restricted to given slots (first one may be None if block was not reached yet)
+def join_states(state1, state2, slots):
+    if state1 is None:
+        return {var_slot: state2[var_slot] for var_slot in slots}
+    return {var_slot: state1[var_slot] | state2[var_slot] for var_slot in slots}
+
+
+# changes state according to successfully executed instruction, returns False if the instruction always fails
+def infer_instruction(instr, state):
+    arg_kinds = argument_kinds[instr.opcode]
+    required = required_types.get(instr.opcode, {})
+    for arg_num, arg in instr.args.items():
+        if arg_num == 5:  # compared with result of superinstruction, it is read after the result is written
+            continue
+        if arg_num in required:
+            allowed = required[arg_num]
+        elif arg_kinds[arg_num - 1] == 'S':
+            allowed = initialized_types
+        else:
+            continue
+        if arg.type != 'var':
+            if arg.type not in allowed:  # constant of a wrong type
+                return False
+        elif arg.frame == GF and arg.slot in state:
+            state[arg.slot] = state[arg.slot] & allowed
+            if not state[arg.slot]:
+                return False
+    dest_slot = written_slot(instr)
+    if dest_slot is not None:
+        if dest_slot in state:
+            # variable must not be defined yet by DEFVAR, must be defined by other instructions
+            state[dest_slot] = state[dest_slot] & ({'undef'} if instr.opcode in ('DEFVAR', 'DEFVARMOVE') else
+                                                   defined_types)
+            if not state[dest_slot]:
+                return False
+        if instr.opcode in ('MOVE', 'DEFVARMOVE'):
+            source = instr.arg2
+            if source.type != 'var':
+                state[dest_slot] = single_types[source.type]
+            elif source.frame == GF:
+                state[dest_slot] = state.get(source.slot, initialized_types)
+            else:
+                state[dest_slot] = initialized_types
+        elif instr.opcode == 'READ':
+            state[dest_slot] = single_types[instr.arg2.val] | {'nil'}
+        else:
+            state[dest_slot] = result_types[instr.opcode]
+    if instr.arg5 is not None and instr.arg5.type == 'var' and instr.arg5.frame == GF and instr.arg5.slot in state:
+        state[instr.arg5.slot] = state[instr.arg5.slot] & required[5]
+        if not state[instr.arg5.slot]:
+            return False
+    return True
+
+
+# returns type of symbol if it is proven by given state, None otherwise
+def proven_type(symb_arg, state):
+    if symb_arg.type != 'var':
+        return symb_arg.type
+    if symb_arg.frame != GF or len(state[symb_arg.slot]) != 1:
+        return None
+    var_type, = state[symb_arg.slot]
+    return var_type if var_type in initialized_types else None
+
+
+# returns fast variant of instruction if its operand types and destination are proven by given state
+def select_fast_opcode(instr, state):
+    if instr.opcode not in fast_opcodes:
+        return None
+    fast_opcode, operand_types = fast_opcodes[instr.opcode]
+    if instr.label_arg is not None and instr.label_arg.target is None:  # undefined label is runtime error
+        return None
+    if instr.label_arg is not instr.arg1:  # destination must be defined global variable
+        if instr.arg1.frame != GF or 'undef' in state[instr.arg1.slot]:
+            return None
+    operand_type = proven_type(instr.arg2, state)
+    if operand_type not in operand_types or proven_type(instr.arg3, state) != operand_type:
+        return None
+    if instr.arg5 is not None and not same_var(instr.arg5, instr.arg1) and proven_type(instr.arg5, state) != 'int':
+        return None
+    return fast_opcode
+
+# ### end of type inference ### #
+
+
+# ### CHECKPOINTS ### #
+# checkpoint file: magic, program fingerprint, instruction register, frames, stack and input cursor (little endian),
+# strings are utf-8 encoded, ints are stored as decimal text (they are not limited in size)
+checkpoint_magic = b'IPPCKPT1'
+
+# tags of slot contents in checkpoint file (None - undefined variable, '' - uninitialized variable)
+checkpoint_tags = {None: 0, '': 1, 'int': 2, 'bool': 3, 'string': 4, 'nil': 5}
+checkpoint_types = {tag: value_type for value_type, tag in checkpoint_tags.items()}
+
+
+# returns fingerprint of the program before tail calls (checkpoint can be resumed only by the same program, runs with
+# and without tail calls have interchangeable states, return address of tail call leads only to RETURN)
+def program_fingerprint(instr_arr):
+    digest = hashlib.sha256()
+    for inst_num in range(1, len(instr_arr) + 1):
+        instr = instr_arr[inst_num]
+        args = [(arg.type, arg.val, arg.target) for arg in instr.args.values()]
+        digest.update(repr((inst_num, instr.opcode, args, instr.jump_when)).encode())
+    return digest.digest()
+
+
+# returns binary representation of value of given type (mutable strings are stored as python strings)
+def pack_value(value, value_type):
+    if value_type == 'int':
+        data = str(value).encode()
+    elif value_type == 'bool':
+        data = b'\x01' if value else b'\x00'
+    elif value_type == 'string':
+        if value.__class__ is StringBuilder:
+            value = value.text()
+        data = value.encode('utf-8', 'surrogatepass')
+    else:
+        data = b''
+    return struct.pack('<BI', checkpoint_tags[value_type], len(data)) + data
+
+
+# returns binary representation of frame (None if frame is not initialized)
+def pack_frame(frame):
+    if frame is None:
+        return b'\x00'
+    data = [struct.pack('<BI', 1, len(frame.types))]
+    for value, value_type in zip(frame.values, frame.types):
+        data.append(pack_value(value, value_type))
+    return b''.join(data)
+
+
+# saves state of interpreter into checkpoint file, output written so far is flushed first
+def save_checkpoint(machine, file_name, fingerprint):
+    frames = machine.frames
+    stack = machine.stack
+    ir = machine.ir
+    machine.output.flush()
+    machine.error_output.flush()
+    data = [checkpoint_magic, fingerprint, struct.pack('<II', ir.curr_i, len(ir.return_address_arr))]
+    data.append(struct.pack('<%dI' % len(ir.return_address_arr), *ir.return_address_arr))
+    data.append(pack_frame(frames.gf))
+    data.append(struct.pack('<I', frames.lf_frames_in))
+    data += [pack_frame(frame) for frame in frames.lf_frame_arr[1:]]
+    data.append(pack_frame(frames.tf))
+    data.append(struct.pack('<I', stack.size))
+    data += [pack_value(stack.values[index], stack.types[index]) for index in range(stack.size)]
+    data.append(struct.pack('<Q', machine.input_reader.consumed))
+    try:
+        with open(file_name + '.tmp', 'wb') as checkpoint_file:  # checkpoint is replaced only when fully written
+            checkpoint_file.write(b''.join(data))
+        os.replace(file_name + '.tmp', file_name)
+    except OSError:  # checkpoint cannot be written
+        raise InterpretExit(12)
+
+
+# deletes checkpoint file of finished program (output is written first, checkpoint is needed until then)
+def remove_checkpoint(machine, file_name):
+    machine.output.flush()
+    try:
+        os.remove(file_name)
+    except OSError:  # no checkpoint was saved
+        pass
+
+
+# restores state of interpreter from checkpoint file, input lines consumed before the checkpoint are skipped
+def load_checkpoint(machine, file_name, fingerprint):
+    frames = machine.frames
+    ir = machine.ir
+    try:
+        with open(file_name, 'rb') as checkpoint_file:
+            reader = BinaryReader(checkpoint_file.read())
+    except OSError:  # checkpoint doesnt exist
+        raise InterpretExit(11)
+    try:
+        if reader.read_bytes(len(checkpoint_magic)) != checkpoint_magic:  # not a checkpoint file
+            raise InterpretExit(11)
+        if reader.read_bytes(len(fingerprint)) != fingerprint:  # checkpoint of a different program
+            raise InterpretExit(11)
+        curr_i, ret_count = reader.unpack('<II')
+        return_addresses = list(reader.unpack('<%dI' % ret_count))
+        global_frame = reader.read_frame(len(machine.ia.gf_slots))
+        lf_count, = reader.unpack('<I')
+        local_frames = [reader.read_frame(frames.lf_size) for _ in range(lf_count)]
+        temporary_frame = reader.read_frame(frames.lf_size)
+        stack_count, = reader.unpack('<I')
+        stack_items = [reader.read_value() for _ in range(stack_count)]
+        consumed, = reader.unpack('<Q')
+    except (struct.error, KeyError, ValueError):  # corrupted checkpoint
+        raise InterpretExit(11)
+    if reader.pos != len(reader.data) or global_frame is None or None in local_frames:
+        raise InterpretExit(11)
+    ir.curr_i = curr_i
+    ir.return_address_arr[:] = return_addresses
+    frames.gf = global_frame
+    frames.lf_frame_arr = [None] + local_frames
+    frames.lf_frames_in = lf_count
+    frames.lf = frames.lf_frame_arr[-1]
+    frames.tf = temporary_frame
+    for stack_value, stack_type in stack_items:  # stack is refilled by pushing (max depth still applies)
+        machine.stack.ipp_pushs(stack_value, stack_type)
+    machine.input_reader.skip(consumed)
+
+# ### end of checkpoints ### #
+
+
+# ### BINARY PROGRAM ### #
+# binary program (written by --emit-binary, little endian): magic, identity of opcode and type tables, sha256 digest
+# of the rest of data, counts of global and local variables, labels, constants and instructions ('<IIIII'), variable
+# name tables (names in order of their slots), label table (name and instruction number), constant pool (type tag of
+# types list and value: int as text, bool as byte, nil without value, others as string) and source instructions
+# (before fusing and type inference, which are done again after loading): order, opcode id and argument count
+# ('<QBB', order which does not fit is followed by its text) and arguments ('<BBI': type tag, frame id and slot
+# of variable or index into constant pool), strings are stored with length prefix in utf-8
+binary_magic = b'IPPBIN03'
+
+# identity of tables which give meaning to opcode ids and type tags, binary program written with other tables is
+# rejected (digest only detects corrupted data)
+binary_tables_id = hashlib.sha256(repr((opcode_names, argument_kinds, types, list(frame_ids))).encode()).digest()
+
+# order value stored in instruction record of instructions whose order does not fit (text of order follows)
+max_packed_order = 2 ** 64 - 1
+
+# cached program file: magic, cache key and binary program
+program_magic = b'IPPCODE3'
+
+
+# returns cache key of given source document, key changes with the source and with the interpreter version
+def program_cache_key(source_data):
+    digest = hashlib.sha256()
+    with open(os.path.abspath(__file__), 'rb') as interpreter_file:
+        digest.update(interpreter_file.read())
+    digest.update(source_data)
+    return digest.digest()
+
+
+# returns binary representation of string
+def pack_string(text):
+    data = text.encode('utf-8', 'surrogatepass')
+    return struct.pack('<I', len(data)) + data
+
+
+# returns binary representation of constant of constant pool
+def pack_constant(value, value_type):
+    data = struct.pack('<B', types.index(value_type))
+    if value_type == 'bool':
+        return data + struct.pack('<B', value)
+    if value_type == 'nil':
+        return data
+    return data + pack_string(output_repr(value, value_type))
+
+
+# returns list of binary parts of instruction record, constants of arguments are added into given constant pool
+# ((type, value) -> index)
+def pack_instruction(instr, constants):
+    order = min(instr.order, max_packed_order)
+    record = [struct.pack('<QBB', order, instr.code, len(instr.args))]
+    if order == max_packed_order:
+        record.append(pack_string(str(instr.order)))
+    for arg in instr.args.values():
+        if arg.type == 'var':
+            record.append(struct.pack('<BBI', types.index('var'), arg.frame, arg.slot))
+        else:
+            index = constants.setdefault((arg.type, arg.val), len(constants))
+            record.append(struct.pack('<BBI', types.index(arg.type), 0, index))
+    return record
+
+
+# returns binary program of validated and pre-decoded program (before fusing, type inference and optimization) and
+# its labels
+def pack_program(instr_arr, label_dict):
+    constants = {}  # constant pool: (type, value) -> index
+    instructions = []
+    for inst_num in range(1, len(instr_arr) + 1):
+        instructions.append(b''.join(pack_instruction(instr_arr[inst_num], constants)))
+    data = [struct.pack('<IIIII', len(instr_arr.gf_slots), len(instr_arr.lf_slots), len(label_dict), len(constants),
+                        len(instr_arr))]
+    data += [pack_string(var_name) for var_name in instr_arr.gf_slots]  # names in order of their slots
+    data += [pack_string(var_name) for var_name in instr_arr.lf_slots]
+    for label_name, target in label_dict.items():
+        data += [pack_string(label_name), struct.pack('<I', target)]
+    data += [pack_constant(value, value_type) for value_type, value in constants]
+    data = b''.join(data + instructions)
+    return binary_magic + binary_tables_id + hashlib.sha256(data).digest() + data
+
+
+# returns constant pool read from binary program (list of tuples of type and pre-decoded value),
+# exits with code 32 if a constant is not valid
+def unpack_constants(reader, const_count):
+    constants = []
+    for _ in range(const_count):
+        const_type = types[reader.unpack('<B')[0]]
+        if const_type == 'bool':
+            value = reader.unpack('<B')[0] == 1
+        elif const_type == 'nil':
+            value = 'nil'
+        else:
+            value = reader.read_string()
+            if const_type == 'int':
+                value = int(value)
+            elif const_type == 'var' or (const_type != 'string' and not value_regexes[const_type].fullmatch(value)):
+                raise InterpretExit(32)
+        constants.append((const_type, value))
+    return constants
+
+
+# returns pre-decoded prepared program and its labels read from binary program, exits with code 32 if program is not
+# valid (53 if an instruction has argument of wrong type), 31 if its digest does not match (type inference is not
+# repeated, so changed program is not accepted), truncated or corrupted data raise struct.error, IndexError
+# or ValueError
+def unpack_program(reader):
+    if reader.read_bytes(len(binary_magic)) != binary_magic:
+        raise InterpretExit(31)
+    if reader.read_bytes(len(binary_tables_id)) != binary_tables_id:  # written by incompatible interpreter
+        raise InterpretExit(11)
+    digest = reader.read_bytes(hashlib.sha256().digest_size)
+    if hashlib.sha256(memoryview(reader.data)[reader.pos:]).digest() != digest:
+        raise InterpretExit(31)
+    instr_arr = InstructionArray()
+    gf_count, lf_count, label_count, const_count, inst_count = reader.unpack('<IIIII')
+    gf_names = [sys.intern(reader.read_string()) for _ in range(gf_count)]
+    lf_names = [sys.intern(reader.read_string()) for _ in range(lf_count)]
+    instr_arr.gf_slots = {var_name: var_slot for var_slot, var_name in enumerate(gf_names)}
+    instr_arr.lf_slots = {var_name: var_slot for var_slot, var_name in enumerate(lf_names)}
+    if len(instr_arr.gf_slots) != gf_count or len(instr_arr.lf_slots) != lf_count:  # variable names must not repeat
+        raise InterpretExit(32)
+    reader.var_names = [gf_names, lf_names, lf_names]  # indexed by frame id
+    for _ in range(label_count):
+        label_name = reader.read_string()
+        reader.label_dict[label_name], = reader.unpack('<I')
+    reader.constants = unpack_constants(reader, const_count)
+    reader.const_args = [None] * const_count
+    label_dict = reader.label_dict
+
+    program = []
+    prev_order = 0
+    for _ in range(inst_count):
+        instr = reader.read_instruction()
+        if instr.order <= prev_order:  # orders are increasing
+            raise InterpretExit(32)
+        prev_order = instr.order
+        program.append(instr)
+    if reader.pos != len(reader.data):
+        raise InterpretExit(31)
+    for label_name, target in label_dict.items():  # labels must point to their LABEL instructions
+        if not 1 <= target <= inst_count or program[target - 1] != 'LABEL' or \
+                program[target - 1].arg1.val != label_name:
+            raise InterpretExit(32)
+    instr_arr.set_program(program)
+    return instr_arr, label_dict
+
+
+# returns program and its labels loaded from binary program, exits with code 31 if data is truncated or corrupted
+def load_binary_program(data):
+    gc.disable()  # loading creates lots of acyclic objects, repeated garbage collection would only slow it down
+    try:
+        return unpack_program(ProgramReader(data))
+    except (struct.error, IndexError, ValueError):
+        raise InterpretExit(31)
+    finally:
+        gc.enable()
+
+
+# writes binary program of given program and its labels into file, exits with code 12 if it cannot be written
+def save_binary_program(file_name, instr_arr, label_dict):
+    try:
+        with open(file_name, 'wb') as binary_file:
+            binary_file.write(pack_program(instr_arr, label_dict))
+    except (OSError, struct.error):
+        raise InterpretExit(12)
+
+
+# returns pre-decoded program and its labels from cache file, None if the file is missing or invalid
+def load_cached_program(file_name, key):
+    try:
+        with open(file_name, 'rb') as cache_file:
+            reader = ProgramReader(cache_file.read())
+    except OSError:
+        return None
+    try:
+        if reader.read_bytes(len(program_magic)) != program_magic or reader.read_bytes(len(key)) != key:
+            return None
+        return unpack_program(reader)
+    except (struct.error, IndexError, ValueError, InterpretExit):  # corrupted cache file, program is loaded from source
+        return None
+
+
+# saves pre-decoded program and its labels into cache file, program runs without cache if it cannot be saved
+def save_cached_program(file_name, instr_arr, label_dict, key):
+    temp_name = file_name + '.' + str(os.getpid()) + '.tmp'  # concurrent runs may save the same program
+    try:
+        data = program_magic + key + pack_program(instr_arr, label_dict)
+        os.makedirs(os.path.dirname(os.path.abspath(file_name)), exist_ok=True)
+        with open(temp_name, 'wb') as cache_file:
+            cache_file.write(data)
+        os.replace(temp_name, file_name)
+    except (OSError, struct.error):
+        pass
+
+# ### end of binary program ### #
+
+
+# ### TRACING ### #
+# trace file: magic, table of instructions (text representations indexed by instruction number) and one record
+# per executed instruction: instruction number, flags, number of operands and values of operands before execution
+# (packed by pack_value), the last record has instruction number 0 and is followed by exit code (little endian)
+trace_magic = b'IPPTRAC1'
+
+# flags of trace record
+trace_breakpoint = 1
+
+
+# returns set of instruction numbers of given breakpoints (comma separated order numbers or label names, None if
+# there are none) and BREAK instructions, exits with code 10 if some breakpoint is not in the program
+def breakpoint_set(machine, break_list):
+    ia = machine.ia
+    breakpoints = {inst_num for inst_num in range(1, len(ia) + 1) if ia[inst_num] == 'BREAK'}
+    for name in break_list.split(',') if break_list is not None else []:
+        if name.isdigit():  # order number of instruction (the first one of fused instructions)
+            found = {ia.position(int(name))} - {None}
+        else:  # first instruction after the label in source program (instruction which replaced it after passes)
+            order = ia.label_orders.get(name)
+            found = {ia.position(order)} if order is not None else set()
+        if not found:
+            raise InterpretExit(10)
+        breakpoints |= found
+    return breakpoints
+
+
+# returns list of operands (constants and variables) of every instruction indexed by instruction number
+def traced_operands(machine):
+    ia = machine.ia
+    operands = [None]
+    for inst_num in range(1, len(ia) + 1):
+        operands.append([arg for arg in ia[inst_num].args.values() if arg.type not in ('label', 'type')])
+    return operands
+
+
+# returns binary representation of current value of given operand, variables are read without any checks
+def pack_operand(arg, frames):
+    if arg.type != 'var':
+        return pack_value(arg.val, arg.type)
+    if arg.frame == GF:
+        frame = frames.gf
+    elif arg.frame == LF:
+        frame = frames.lf
+    else:
+        frame = frames.tf
+    if frame is None:  # undefined frame, operand is stored as undefined variable
+        return pack_value(None, None)
+    return pack_value(frame.values[arg.slot], frame.types[arg.slot])
+
+
+# writes header of trace file (instruction table)
+def write_trace_header(machine, trace_file):
+    ia = machine.ia
+    data = [trace_magic, struct.pack('<I', len(ia))]
+    data += [pack_string(instruction_repr(ia[inst_num])) for inst_num in range(1, len(ia) + 1)]
+    trace_file.write(b''.join(data))
+
+
+# returns text representation of frame with given variable slots (name -> slot), undefined variables are skipped
+def frame_repr(frame, slots, prefix):
+    if frame is None:
+        return prefix + ': (undefined)'
+    variables = []
+    for name, var_slot in slots.items():
+        if frame.types[var_slot] == '':
+            variables.append(prefix + '@' + name + ' = (uninitialized)')
+        elif frame.types[var_slot] is not None:
+            variables.append(prefix + '@' + name + ' = ' + value_repr(frame.values[var_slot], frame.types[var_slot]))
+    return prefix + ': ' + (', '.join(variables) if variables else '(empty)')
+
+
+# writes state of interpreter into stderr when breakpoint at current instruction is reached
+def breakpoint_dump(machine, steps):
+    ia = machine.ia
+    frames = machine.frames
+    stack = machine.stack
+    ir = machine.ir
+    error_output = machine.error_output
+    dump = ['breakpoint: ' + instruction_repr(ia[ir.curr_i]) + ' (' + str(steps) + ' instructions executed)',
+            frame_repr(frames.gf, ia.gf_slots, 'GF'),
+            frame_repr(frames.lf, ia.lf_slots, 'LF') + ' (' + str(frames.lf_frames_in) + ' local frames)',
+            frame_repr(frames.tf, ia.lf_slots, 'TF'),
+            'stack (' + str(stack.size) + ' values, top last): ' +
+            ' '.join(value_repr(stack.values[index], stack.types[index]) for index in range(stack.size)),
+            'call stack (' + str(len(ir.return_address_arr)) + ' calls, innermost first):']
+    for return_address in reversed(ir.return_address_arr):
+        dump.append('  ' + instruction_repr(ia[return_address]))
+    error_output.write('\n'.join(dump) + '\n')
+    error_output.flush()
+
+# ### end of tracing ### #
+
+
+# ### INTERPRETATION LOOPS ### #
+# main run, interprets the source code (instructions are dispatched by their integer opcode id)
+def run_program(machine):
+    ia = machine.ia
+    ir = machine.ir
+    root = ia.root
+    inst_count = len(ia)
+    while ir.curr_i <= inst_count:
+        curr_instr = root[ir.curr_i]  # current instruction
+        dispatch_table[curr_instr.code](curr_instr, machine)
+        ir.curr_i += 1  # increment instruction no
+
+
+# same as run_program, but every executed instruction is recorded by given profiler
+def run_program_profiled(machine, profiler):
+    ia = machine.ia
+    ir = machine.ir
+    root = ia.root
+    inst_count = len(ia)
+    clock = time.perf_counter_ns
+    return_addresses = ir.return_address_arr
+    while ir.curr_i <= inst_count:
+        curr_i = ir.curr_i
+        curr_instr = root[curr_i]  # current instruction
+        depth = len(return_addresses)
+        start = clock()
+        try:
+            dispatch_table[curr_instr.code](curr_instr, machine)
+        except InterpretExit:  # EXIT or runtime error, instruction is recorded too
+            profiler.record(curr_i, curr_instr, clock() - start)
+            raise
+        end = clock()
+        profiler.record(curr_i, curr_instr, end - start)
+        if len(return_addresses) > depth:  # CALL was performed
+            profiler.call(curr_instr.arg1.val, start)
+        elif len(return_addresses) < depth:  # RETURN was performed
+            profiler.ret(end)
+        elif ir.curr_i < curr_i and curr_instr.label_arg is not None:
+            profiler.back_edge(curr_instr.label_arg.val, ir.curr_i, curr_i)  # backward jump closes a loop
+        ir.curr_i += 1  # increment instruction no
+
+
+# same as run_program, but state of interpreter is saved into checkpoint file after every interval instructions
+def run_program_checkpointed(machine, file_name, interval, fingerprint):
+    ia = machine.ia
+    ir = machine.ir
+    root = ia.root
+    inst_count = len(ia)
+    countdown = interval
+    try:
+        while ir.curr_i <= inst_count:
+            curr_instr = root[ir.curr_i]  # current instruction
+            dispatch_table[curr_instr.code](curr_instr, machine)
+            ir.curr_i += 1  # increment instruction no
+            countdown -= 1
+            if countdown == 0:
+                save_checkpoint(machine, file_name, fingerprint)
+                countdown = interval
+    except ProgramExit:
+        remove_checkpoint(machine, file_name)
+        raise
+    except InterpretExit:  # runtime error, checkpoint is kept
+        raise
+    except BaseException:  # interrupted run, output since the last checkpoint is written again by resumed run
+        machine.output.discard()
+        raise
+    remove_checkpoint(machine, file_name)
+
+
+# same as run_program, but interpretation ends with exit code 59 when it exceeds given number of executed instructions
+# or given time in seconds (None - no limit), time is checked only once per limit_check_interval instructions
+def run_program_limited(machine, max_steps, max_time):
+    ia = machine.ia
+    ir = machine.ir
+    root = ia.root
+    inst_count = len(ia)
+    start = time.perf_counter()
+    step_limit = max_steps if max_steps is not None else float('inf')
+    steps = 0  # number of executed instructions
+    next_check = min(limit_check_interval, step_limit)  # number of executed instructions when limits are checked
+    while ir.curr_i <= inst_count:
+        if steps == next_check:
+            elapsed = time.perf_counter() - start
+            if steps == step_limit:
+                limit_exceeded(machine, 'step limit of ' + str(max_steps) + ' instructions', steps, elapsed)
+            if max_time is not None and elapsed > max_time:
+                limit_exceeded(machine, 'time limit of ' + str(max_time) + ' s', steps, elapsed)
+            next_check = min(steps + limit_check_interval, step_limit)
+        curr_instr = root[ir.curr_i]  # current instruction
+        dispatch_table[curr_instr.code](curr_instr, machine)
+        ir.curr_i += 1  # increment instruction no
+        steps += 1
+
+
+# writes state of interpretation (next instruction and call stack) into stderr and exits with given code
+def limit_exceeded(machine, reason, steps, elapsed, exit_code=59):
+    ia = machine.ia
+    ir = machine.ir
+    error_output = machine.error_output
+    dump = ['interpretation stopped: ' + reason + ' exceeded (' + str(steps) + ' instructions executed in ' +
+            '%.3f' % elapsed + ' s)',
+            'next instruction: ' + str(ir.curr_i) + ' ' + instruction_repr(ia[ir.curr_i]),
+            'call stack (' + str(len(ir.return_address_arr)) + ' calls, innermost first):']
+    for return_address in reversed(ir.return_address_arr):
+        dump.append('  ' + str(return_address) + ' ' + instruction_repr(ia[return_address]))
+    error_output.write('\n'.join(dump) + '\n')
+    error_output.flush()
+    raise InterpretExit(exit_code)
+
+
+# same as run_program_limited, but approximate memory held by the program is accounted after every instruction
+# (value of its destination variable, stack item pushed or popped, values of discarded temporary frame),
+# interpretation ends with exit code 61 when it exceeds max memory in bytes (None - no memory limit), memory
+# statistics are written to stderr every report_interval instructions and at the end (None - no statistics)
+def run_program_accounted(machine, max_steps, max_time, max_memory, report_interval):
+    ia = machine.ia
+    frames = machine.frames
+    stack = machine.stack
+    ir = machine.ir
+    root = ia.root
+    inst_count = len(ia)
+    start = time.perf_counter()
+    step_limit = max_steps if max_steps is not None else float('inf')
+    memory_limit = max_memory if max_memory is not None else float('inf')
+    destinations = [None] + [instr.arg1 if instr.arg1 is not None and instr.arg1.type == 'var' else None
+                             for instr in root[1:]]  # variables written by instructions (first argument)
+    discarding = (opcode_ids['CREATEFRAME'], opcode_ids['POPFRAME'])  # instructions discarding temporary frame
+    pushs_id = opcode_ids['PUSHS']
+    pops_id = opcode_ids['POPS']
+    counter = MemoryCounter(machine)
+    steps = 0  # number of executed instructions
+    next_check = min(limit_check_interval, step_limit)  # number of executed instructions when limits are checked
+    next_report = report_interval if report_interval is not None else float('inf')
+    try:
+        while ir.curr_i <= inst_count:
+            if steps == next_check:
+                elapsed = time.perf_counter() - start
+                if steps == step_limit:
+                    limit_exceeded(machine, 'step limit of ' + str(max_steps) + ' instructions', steps, elapsed)
+                if max_time is not None and elapsed > max_time:
+                    limit_exceeded(machine, 'time limit of ' + str(max_time) + ' s', steps, elapsed)
+                next_check = min(steps + limit_check_interval, step_limit)
+            if steps == next_report:
+                memory_report(machine, counter, steps, time.perf_counter() - start)
+                next_report += report_interval
+            curr_instr = root[ir.curr_i]  # current instruction
+            code = curr_instr.code
+            dest = destinations[ir.curr_i]
+            # bytes of values overwritten or discarded
+            released = variable_size(dest, frames) if dest is not None else 0
+            if code in discarding and frames.tf is not None:
+                released += frame_values_size(frames.tf)
+            elif code == pops_id and stack.size:
+                released += value_size(stack.values[stack.size - 1])
+            dispatch_table[code](curr_instr, machine)
+            acquired = variable_size(dest, frames) if dest is not None else 0  # bytes of new values
+            if code == pushs_id:
+                acquired += value_size(stack.values[stack.size - 1])
+            counter.value_bytes += acquired - released
+            ir.curr_i += 1  # increment instruction no
+            steps += 1
+            used = counter.total()
+            if used > counter.high_water:
+                counter.high_water = used
+                if used > memory_limit:
+                    limit_exceeded(machine, 'memory limit of ' + str(max_memory) + ' bytes', steps,
+                                   time.perf_counter() - start, 61)
+    finally:
+        if report_interval is not None:  # final statistics are written after EXIT and errors too
+            memory_report(machine, counter, steps, time.perf_counter() - start)
+
+
+# writes memory statistics of interpreted program into stderr
+def memory_report(machine, counter, steps, elapsed):
+    machine.error_output.write('memory: ' + str(steps) + ' instructions in ' + '%.3f' % elapsed + ' s, ' +
+                               str(counter.total()) + ' bytes held, high-water ' + str(counter.high_water) + ' bytes\n')
+
+
+# same as run_program, but blocks of instructions are executed by python functions compiled by given block compiler,
+# every block function returns number of the next instruction
+def run_program_jit(machine, compiler):
+    ir = machine.ir
+    inst_count = len(machine.ia)
+    functions = compiler.functions
+    next_i = ir.curr_i
+    while next_i <= inst_count:
+        block_function = functions[next_i]
+        if block_function is None:  # block is compiled when it is executed for the first time
+            block_function = compiler.compile_block(next_i)
+        next_i = block_function(machine)
+    ir.curr_i = next_i
+
+
+# same as run_program, but every executed instruction is logged into given trace file (None - no trace) and state of
+# interpreter is dumped before executing instruction from given set of breakpoints (instruction numbers)
+def run_program_traced(machine, trace_file, breakpoints):
+    ia = machine.ia
+    ir = machine.ir
+    root = ia.root
+    inst_count = len(ia)
+    operands = traced_operands(machine)
+    steps = 0  # number of executed instructions
+    exit_code = 0
+    try:
+        while ir.curr_i <= inst_count:
+            curr_i = ir.curr_i
+            curr_instr = root[curr_i]  # current instruction
+            flags = 0
+            if curr_i in breakpoints:
+                breakpoint_dump(machine, steps)
+                flags = trace_breakpoint
+            if trace_file is not None:
+                trace_file.write(struct.pack('<IBB', curr_i, flags, len(operands[curr_i])) +
+                                 b''.join([pack_operand(arg, machine.frames) for arg in operands[curr_i]]))
+            dispatch_table[curr_instr.code](curr_instr, machine)
+            ir.curr_i += 1  # increment instruction no
+            steps += 1
+    except InterpretExit as exit_exception:  # EXIT or runtime error, exit code ends the trace
+        exit_code = exit_exception.code
+        raise
+    finally:
+        if trace_file is not None:
+            trace_file.write(struct.pack('<IBBi', 0, 0, 0, exit_code))
+
+# ### end of interpretation loops ### #
+
+
+# ### BATCH MODE ### #
+# returns list of input files of batch: regular files in given directory (sorted by name) or files listed
+# in given manifest file (one file per line, relative paths are relative to the directory of manifest)
+def batch_inputs(batch_path):
+    if os.path.isdir(batch_path):
+        file_names = [os.path.join(batch_path, file_name) for file_name in sorted(os.listdir(batch_path))]
+        return [file_name for file_name in file_names if os.path.isfile(file_name)]
+    try:
+        with open(batch_path, 'r') as manifest:
+            lines = [line.strip() for line in manifest]
+    except OSError:  # manifest doesnt exist
+        raise InterpretExit(11)
+    return [os.path.join(os.path.dirname(batch_path), line) for line in lines if line]
+
+
+# interprets program of batch interpreter with given input file, output and exit code are written into files named
+# after the input file (.out and .rc) in batch output directory,
+# returns exit code of the program (11 if input file cannot be opened), None if results cannot be written
+def run_batch_input(input_file_name):
+    result_name = os.path.join(batch_output_dir, os.path.basename(input_file_name))
+    try:
+        output_file = open(result_name + '.out', 'w')
+    except OSError:
+        return None
+    try:
+        input_file = open(input_file_name, 'r')
+    except OSError:  # input file doesnt exist
+        exit_code = 11
+    else:
+        with input_file:
+            try:
+                exit_code = batch_interpreter.run(input_file, output_file)
+            except InterpretExit as exit_exception:
+                exit_code = exit_exception.code
+    output_file.close()
+    try:
+        with open(result_name + '.rc', 'w') as rc_file:
+            rc_file.write(str(exit_code) + '\n')
+    except OSError:
+        return None
+    return exit_code
+
+
+# interprets program loaded by given interpreter with every input file of the batch (each run has fresh state),
+# results are written into given output directory by given number of parallel processes, returns exit code
+def run_batch(interpreter, batch_path, output_dir, jobs):
+    global batch_interpreter, batch_output_dir
+    batch_files = batch_inputs(batch_path)
+    if len(set(os.path.basename(file_name) for file_name in batch_files)) != len(batch_files):
+        raise InterpretExit(10)  # results of inputs with the same name would overwrite each other
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError:  # output directory cannot be created
+        raise InterpretExit(12)
+    batch_interpreter = interpreter
+    batch_output_dir = output_dir
+    import multiprocessing  # imported only in batch mode, short runs do not pay for it
+    if jobs > 1 and 'fork' in multiprocessing.get_all_start_methods():  # workers inherit already loaded program
+        with multiprocessing.get_context('fork').Pool(jobs) as pool:
+            exit_codes = pool.map(run_batch_input, batch_files)
+    else:
+        exit_codes = [run_batch_input(file_name) for file_name in batch_files]
+    if None in exit_codes:  # results of some runs cannot be written
+        raise InterpretExit(12)
+    sys.stderr.write('batch: ' + str(len(exit_codes)) + ' inputs, ' +
+                     str(sum(exit_code != 0 for exit_code in exit_codes)) + ' with non-zero exit code\n')
+    return 0
+
+# ### end of batch mode ### #
+
+
+# ### PROGRAM ARGUMENT PARSING ### #
+# returns dict of options given by command line arguments (option name -> value, None if option has no value)
+def parse_options(argv):
+    options = {}
+    for argument in argv:
+        option = re.fullmatch(r'^--([a-z\-]+)(?:=([^\s]*))?$', argument)
+        if option is None or option.group(1) in options:  # wrong or repeated argument
+            raise InterpretExit(10)
+        options[option.group(1)] = option.group(2)
+    return options
+
+
+# checks names and values of given options and their combinations, raises InterpretExit with code 10 if they are wrong
+def check_options(options):
+    for name, value in options.items():
+        if name not in program_options:  # unknown option
+            raise InterpretExit(10)
+        if program_options[name] is None:
+            if value is not None:  # option must not have a value
+                raise InterpretExit(10)
+        elif value is None or re.fullmatch(program_options[name], value) is None:  # option value is wrong
+            raise InterpretExit(10)
+    if ('batch' in options) != ('batch-output' in options):  # batch needs output directory
+        raise InterpretExit(10)
+    if 'jobs' in options and 'batch' not in options:  # parallel runs are supported only in batch mode
+        raise InterpretExit(10)
+    if ('max-steps' in options or 'max-time' in options) and ('profile' in options or 'checkpoint' in options):
+        raise InterpretExit(10)  # limits are enforced by their own interpretation loop
+    if 'jit' in options and any(name in options for name in ('profile', 'checkpoint', 'max-steps', 'max-time')):
+        raise InterpretExit(10)  # compiled blocks do not count or record single instructions
+    if 'batch' in options and any(name in options for name in ('input', 'profile', 'checkpoint', 'resume')):
+        raise InterpretExit(10)  # batch runs are independent, they have their own input and no profile or checkpoints
+    if 'checkpoint-interval' in options and 'checkpoint' not in options:  # interval without checkpoint file
+        raise InterpretExit(10)
+    if 'profile' in options and ('checkpoint' in options or 'resume' in options):  # profile covers the whole run only
+        raise InterpretExit(10)
+    if ('trace' in options or 'break' in options) and any(name in options for name in (
+            'profile', 'checkpoint', 'max-steps', 'max-time', 'jit', 'batch')):
+        raise InterpretExit(10)  # tracing has its own interpretation loop
+    if ('max-memory' in options or 'memory-stats' in options) and any(name in options for name in (
+            'profile', 'checkpoint', 'jit', 'trace', 'break')):
+        raise InterpretExit(10)  # memory is accounted by its own interpretation loop
+    if 'emit-binary' in options and ('input' in options or 'batch' in options):  # program is not interpreted
+        raise InterpretExit(10)
+
+# ### end of program argument parsing ### #
+
+
+# ### INTERPRETATION OF SOURCE CODE ### #
+# runs interpreter with given command line arguments, returns exit code
+def main(argv):
+    options = parse_options(argv)
+    if 'help' in options:
+        if len(options) != 1:  # help cannot be combined with other options
+            raise InterpretExit(10)
+        display_help()  # display help
+        return 0
+    if not any(name in options for name in ('source', 'input', 'batch', 'emit-binary')):  # at least one file is needed
+        raise InterpretExit(10)
+    interpreter = Interpreter(options)  # options are checked
+
+    # opening files
+    input_stream = sys.stdin
+    if 'input' in options:
+        try:
+            input_stream = open(options['input'], 'r')  # input file is read lazily by READ instructions
+        except FileNotFoundError:  # file doesnt exist
+            raise InterpretExit(11)
+    source_stream = sys.stdin.buffer
+    if 'source' in options:
+        try:
+            source_stream = open(options['source'], 'rb')  # open source code file, it is read while parsing
+        except FileNotFoundError:  # file doesnt exist
+            raise InterpretExit(11)
+
+    interpreter.load(source_stream)
+    if 'emit-binary' in options:  # program is only converted
+        return 0
+    if 'batch' in options:  # program is interpreted with every input file of the batch
+        return run_batch(interpreter, options['batch'], options['batch-output'], int(options.get('jobs', 1)))
+    return interpreter.run(input_stream, sys.stdout, sys.stderr)
+
+
+if __name__ == '__main__':
+    try:
+        exit_code = main(sys.argv[1:])
+    except InterpretExit as exit_exception:  # error of interpretation or invalid arguments
+        exit_code = exit_exception.code
+    sys.exit(exit_code)
+
+# ### end of file ### #
@@ -0,0 +1,177 @@
+# ###  file:          replay.py  ### #
+# ###  name: ipp project no. 2  ### #
+# ###  author:        xdudaj02  ### #
+# ###  date:          8.4.2021  ### #
+# ###  version:            1.0  ### #
+
+import struct
+import sys
+import re
+
+# NOT SUPPORTED:
+# traces of interrupted runs (trace without its last record)
+
+# ### GLOBAL VARIABLES ### #
+# header of trace file written by interpret.py --trace
+trace_magic = b'IPPTRAC1'
+
+# flags of trace record
+trace_breakpoint = 1
+
+# types of operand values indexed by their tags (None - undefined variable, '' - uninitialized variable)
+value_types = {0: None, 1: '', 2: 'int', 3: 'bool', 4: 'string', 5: 'nil'}
+
+# regex finding opcodes of source instructions in text of instruction (instructions fused by interpreter are
+# separated by semicolons)
+regex_source_opcode = re.compile(r'(?:^|; )\[\d+\] (\S+)')
+
+# default number of reported hottest and last executed instructions
+default_top = 10
+default_tail = 10
+
+
+# ### FUNCTIONS ### #
+# displays program usage help
+def display_help():
+    print('''replay.py  |  version 1.0  |  xdudaj02
+summary of execution trace of IPPcode21 interpreter
+
+USAGE:
+  python3.8 replay.py [--top=N] [--tail=N] trace_file
+  python3.8 replay.py --help
+
+ARGUMENTS:
+  trace_file          file written by interpret.py --trace=trace_file
+  --top=N             number of reported most executed instructions (default 10)
+  --tail=N            number of reported last executed instructions with values of their operands (default 10)
+          ''')
+
+
+# class reads values from binary trace data
+class TraceReader:
+    def __init__(self, data):
+        self.data = data  # whole trace file
+        self.pos = 0  # position of next unread byte
+
+    # returns tuple of values unpacked by given struct format
+    def unpack(self, struct_format):
+        values = struct.unpack_from(struct_format, self.data, self.pos)
+        self.pos += struct.calcsize(struct_format)
+        return values
+
+    # returns given number of bytes
+    def read_bytes(self, count):
+        if self.pos + count > len(self.data):
+            raise ValueError('unexpected end of trace')
+        data = self.data[self.pos:self.pos + count]
+        self.pos += count
+        return data
+
+    # returns utf-8 string prefixed by its length
+    def read_string(self):
+        length, = self.unpack('<I')
+        return self.read_bytes(length).decode('utf-8', 'surrogatepass')
+
+    # returns text representation of one operand value
+    def read_value(self):
+        tag, length = self.unpack('<BI')
+        data = self.read_bytes(length)
+        value_type = value_types[tag]
+        if value_type is None:
+            return '(undefined)'
+        if value_type == '':
+            return '(uninitialized)'
+        if value_type == 'bool':
+            return 'bool@' + ('true' if data == b'\x01' else 'false')
+        text = data.decode('utf-8', 'surrogatepass')
+        text = ''.join('\\%03d' % ord(char) if ord(char) <= 32 or char in '#\\' else char for char in text)
+        return value_type + '@' + text
+
+
+# reads trace file, returns instruction table, list of records (instruction number, flags, operand values)
+# and exit code of the traced program, exits with code 11 if file is not a complete trace
+def load_trace(file_name):
+    try:
+        with open(file_name, 'rb') as trace_file:
+            reader = TraceReader(trace_file.read())
+    except OSError:  # trace file doesnt exist
+        sys.exit(11)
+    try:
+        if reader.read_bytes(len(trace_magic)) != trace_magic:  # not a trace file
+            sys.exit(11)
+        inst_count, = reader.unpack('<I')
+        instructions = [None] + [reader.read_string() for _ in range(inst_count)]
+        records = []
+        while True:
+            inst_num, flags, operand_count = reader.unpack('<IBB')
+            if inst_num == 0:  # last record, exit code follows
+                exit_code, = reader.unpack('<i')
+                break
+            records.append((inst_num, flags, [reader.read_value() for _ in range(operand_count)]))
+    except (struct.error, KeyError, ValueError):  # corrupted or incomplete trace
+        sys.exit(11)
+    return instructions, records, exit_code
+
+
+# prints summary of trace: executed instructions by opcode, most executed instructions, breakpoint hits
+# and last executed instructions with values of their operands
+def print_summary(instructions, records, exit_code, top, tail):
+    counts = [0] * len(instructions)
+    opcode_counts = {}
+    hits = []
+    for index, (inst_num, flags, _) in zip(range(len(records)), records):
+        counts[inst_num] += 1
+        if flags & trace_breakpoint:
+            hits.append(index)
+    for inst_num in range(1, len(instructions)):
+        for opcode in regex_source_opcode.findall(instructions[inst_num]):  # every source instruction is counted
+            opcode_counts[opcode] = opcode_counts.get(opcode, 0) + counts[inst_num]
+
+    print('executed instructions: ' + str(len(records)) + ', exit code ' + str(exit_code))
+    print('\nexecuted instructions by opcode:')
+    for opcode, count in sorted(opcode_counts.items(), key=lambda item: -item[1]):
+        if count:
+            print('  %-16s %12d' % (opcode, count))
+    print('\nmost executed instructions:')
+    hottest = sorted(range(1, len(instructions)), key=lambda inst_num: -counts[inst_num])[:top]
+    for inst_num in hottest:
+        if counts[inst_num]:
+            print('  %12d  %s' % (counts[inst_num], instructions[inst_num]))
+    print('\nbreakpoint hits: ' + str(len(hits)))
+    for index in hits[:top]:
+        print('  %12d  %s' % (index + 1, instructions[records[index][0]]))
+    print('\nlast executed instructions (operand values before execution):')
+    for index in range(max(0, len(records) - tail), len(records)):
+        inst_num, _, values = records[index]
+        print('  %12d  %s' % (index + 1, instructions[inst_num]) + ('  <- ' + ' '.join(values) if values else ''))
+
+
+# ### end of function definitions ### #
+
+
+# ### PROGRAM ARGUMENT PARSING ### #
+if len(sys.argv) == 2 and sys.argv[1] == '--help':
+    display_help()
+    sys.exit(0)
+
+top = default_top
+tail = default_tail
+trace_files = []
+for argument in sys.argv[1:]:
+    option = re.fullmatch(r'^--(top|tail)=(\d+)$', argument)
+    if option is not None:
+        if option.group(1) == 'top':
+            top = int(option.group(2))
+        else:
+            tail = int(option.group(2))
+    elif argument.startswith('--'):
+        sys.exit(10)  # unknown option
+    else:
+        trace_files.append(argument)
+if len(trace_files) != 1:  # exactly one trace file
+    sys.exit(10)
+
+# ### SUMMARY ### #
+print_summary(*load_trace(trace_files[0]), top, tail)
+
+# ### end of file ### #
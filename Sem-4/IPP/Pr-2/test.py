@@ -0,0 +1,364 @@
+# ###  file:            test.py  ### #
+# ###  name: ipp project no. 2  ### #
+# ###  author:        xdudaj02  ### #
+# ###  date:          8.4.2021  ### #
+# ###  version:            1.0  ### #
+
+import importlib.util
+import multiprocessing
+import subprocess
+import contextlib
+import tempfile
+import hashlib
+import json
+import time
+import sys
+import os
+import io
+import re
+
+# NOT SUPPORTED:
+# filenames containing whitespace
+
+# ### GLOBAL VARIABLES ### #
+# default interpreter (interpret.py next to this file)
+default_interpreter = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interpret.py')
+
+# name of default result cache file (stored in tested directory)
+default_cache_name = '.test-cache.json'
+
+# default time limit of one test in seconds and default number of reported slowest tests
+default_timeout = 10.0
+default_slowest = 10
+
+# time in seconds a test in worker process may run over its time limit before its worker is terminated (in-process
+# tests have no time limit of their own, their workers are terminated instead)
+worker_grace_time = 2.0
+
+# interpreter module loaded by worker process (in-process runs)
+interpreter_module = None
+
+
+# ### FUNCTIONS ### #
+# displays program usage help
+def display_help():
+    print('''test.py  |  version 1.0  |  xdudaj02
+parallel test runner of IPPcode21 interpreter
+
+USAGE:
+  python3.8 test.py [--directory=dir] [--recursive] [--interpreter=file] [--jobs=N] [--timeout=T]
+                    [--slowest=N] [--subprocess] [--changed-only] [--cache=file] [--option=opt]...
+  python3.8 test.py --help
+
+ARGUMENTS:
+  --directory=dir     directory with tests (default current directory), test name.src (xml source) may have
+                      input name.in, expected output name.out and expected exit code name.rc (missing input and
+                      output are empty, missing exit code is 0), output is compared if exit code 0 is expected or
+                      name.out exists (output written before an error is compared then),
+                      options of the test (e.g. --max-memory=64K) may be given in name.opt (separated by whitespace),
+                      every line of name.opt is one run of the test (runs share temporary directory which replaces
+                      {tmp}, {test} is replaced by the test path without extension), every run must end with the
+                      expected exit code, outputs of all runs and .out and .rc files written into {tmp} (results
+                      of --batch) are compared together
+  --recursive         tests are searched in subdirectories too
+  --interpreter=file  tested interpreter (default interpret.py next to this file)
+  --jobs=N            number of parallel worker processes (default number of cpus)
+  --timeout=T         time limit of one test in seconds (default 10, 0 - no limit), exceeding it fails the test,
+                      worker process of a test still running 2 s after its limit is terminated (in-process tests
+                      are stopped only this way, so they can be run with any --option)
+  --slowest=N         number of reported slowest tests (default 10)
+  --subprocess        every test is run by a new interpreter process (default is to run tests inside worker
+                      processes through Interpreter class of interpret.py)
+  --changed-only      tests which passed with the same interpreter, source, input and expected results are skipped
+  --cache=file        file with results of previous runs (default .test-cache.json in tested directory)
+  --option=opt        option passed to tested interpreter (e.g. --option=--optimize), may be repeated,
+                      tests in tests directory next to this file are expected to pass with and without --optimize
+          ''')
+
+
+# returns sorted list of tests (paths without .src extension) in given directory
+def discover_tests(directory, recursive):
+    tests = []
+    for root, dirs, files in os.walk(directory):
+        tests += [os.path.join(root, file_name[:-4]) for file_name in files if file_name.endswith('.src')]
+        if not recursive:
+            break
+    return sorted(tests)
+
+
+# returns content of given file, default value if the file doesnt exist
+def read_file(file_name, default):
+    try:
+        with open(file_name, 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        return default
+
+
+# returns expected exit code of test (0 if .rc file is missing, None if it is not a number)
+def expected_exit_code(test):
+    try:
+        return int(read_file(test + '.rc', b'0'))
+    except ValueError:
+        return None
+
+
+# returns hash of interpreter file
+def file_hash(file_name):
+    with open(file_name, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+# returns key of test in result cache, key changes with the interpreter and with any file of the test (files in
+# directory named after the test are batch inputs of the test)
+def test_key(test, interpreter_hash):
+    digest = hashlib.sha256(interpreter_hash.encode())
+    for extension in ('.src', '.in', '.out', '.rc', '.opt'):
+        content = read_file(test + extension, None)
+        digest.update(b'-' if content is None else hashlib.sha256(content).digest())
+    if os.path.isdir(test):
+        for file_name in sorted(os.listdir(test)):
+            digest.update(file_name.encode() + hashlib.sha256(read_file(os.path.join(test, file_name), b'')).digest())
+    return digest.hexdigest()
+
+
+# returns list of runs of test (list of interpreter options of every run, one run per line of .opt file), {tmp} in
+# options is replaced by given temporary directory and {test} by the test path without extension
+def test_runs(test, temp_dir):
+    lines = read_file(test + '.opt', b'').decode().splitlines()
+    runs = [line.replace('{tmp}', temp_dir).replace('{test}', test).split() for line in lines if line.strip()]
+    return runs or [[]]
+
+
+# returns content of .out and .rc files in given directory in order of their names (results of batch runs)
+def result_files(directory):
+    file_names = sorted(file_name for file_name in os.listdir(directory) if file_name.endswith(('.out', '.rc')))
+    return b''.join(read_file(os.path.join(directory, file_name), b'') for file_name in file_names)
+
+
+# loads interpreter module in worker process (program of interpret.py is not executed when it is imported)
+def load_interpreter(interpreter):
+    global interpreter_module
+    spec = importlib.util.spec_from_file_location('interpret', interpreter)
+    interpreter_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(interpreter_module)
+
+
+# returns dict of interpreter options (option name -> value, None if option has no value) from command line options
+def option_dict(interpreter_options):
+    options = {}
+    for interpreter_option in interpreter_options:
+        name, _, value = interpreter_option[2:].partition('=')
+        options[name] = value if '=' in interpreter_option else None
+    return options
+
+
+# runs test inside worker process through Interpreter class, returns exit code and output (time limit of the test
+# is enforced by terminating the worker, --max-time cannot be combined with some options)
+def run_in_process(test, interpreter_options):
+    options = option_dict(interpreter_options)
+    output_stream = io.StringIO()
+    try:
+        interpreter = interpreter_module.Interpreter(options)
+        interpreter.load(read_file(test + '.src', b''))
+        if 'batch' in options:  # results are written into batch output directory, summary is not shown
+            with contextlib.redirect_stderr(io.StringIO()):
+                exit_code = interpreter_module.run_batch(interpreter, options['batch'], options['batch-output'],
+                                                         int(options.get('jobs', 1)))
+        else:
+            input_file_name = test + '.in' if os.path.isfile(test + '.in') else os.devnull
+            with open(input_file_name, 'r') as input_stream:
+                exit_code = interpreter.run(input_stream, output_stream, io.StringIO())
+    except interpreter_module.InterpretExit as exit_exception:
+        exit_code = exit_exception.code
+    return exit_code, output_stream.getvalue().encode('utf-8', 'surrogateescape')
+
+
+# runs test by a new interpreter process, returns exit code and output
+def run_subprocess(test, interpreter, timeout, interpreter_options):
+    input_file_name = test + '.in' if os.path.isfile(test + '.in') else os.devnull
+    command = [sys.executable, interpreter, '--source=' + test + '.src']
+    if not any(option.startswith('--batch=') for option in interpreter_options):  # batch runs have their own inputs
+        command.append('--input=' + input_file_name)
+    try:
+        result = subprocess.run(command + interpreter_options,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout or None)
+    except subprocess.TimeoutExpired:
+        return 59, b''  # test fails as timeout, it ran over its time limit
+    return result.returncode, result.stdout
+
+
+# runs one test, returns tuple of test, result message (None if test passed) and time in seconds
+def run_test(arguments):
+    test, interpreter, timeout, in_process, interpreter_options = arguments
+    start = time.perf_counter()
+    exit_codes = []  # exit code of every run of the test
+    output = b''
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            for run_options in test_runs(test, temp_dir):
+                run_options = interpreter_options + run_options
+                if in_process:
+                    exit_code, run_output = run_in_process(test, run_options)
+                else:
+                    exit_code, run_output = run_subprocess(test, interpreter, timeout, run_options)
+                exit_codes.append(exit_code)
+                output += run_output
+        except Exception as exception:  # interpreter crashed
+            return test, 'interpreter failed: ' + repr(exception), time.perf_counter() - start
+        output += result_files(temp_dir)
+    elapsed = time.perf_counter() - start
+    if timeout and elapsed >= timeout:  # test finished before its worker was terminated, but it was too slow
+        return test, 'timeout after ' + str(timeout) + ' s', elapsed
+    expected_code = expected_exit_code(test)
+    if expected_code is None:
+        return test, 'invalid .rc file', elapsed
+    for run_no, exit_code in zip(range(1, len(exit_codes) + 1), exit_codes):
+        if exit_code != expected_code:
+            run_label = 'run ' + str(run_no) + ': ' if len(exit_codes) > 1 else ''
+            return test, run_label + 'exit code ' + str(exit_code) + ', expected ' + str(expected_code), elapsed
+    if (expected_code == 0 or os.path.isfile(test + '.out')) and output != read_file(test + '.out', b''):
+        return test, 'output differs from expected output', elapsed
+    return test, None, elapsed
+
+
+# runs tests by pool of worker processes, results are collected in order of tests, test whose result does not come
+# in time (limit with grace time) fails as timeout, pool with the hung worker is terminated then and unfinished tests
+# are run by a new pool
+def run_pool(work, jobs, in_process, interpreter, timeout):
+    tests = [arguments[0] for arguments in work]
+    results = []
+    while work:
+        with multiprocessing.Pool(jobs, initializer=load_interpreter if in_process else None,
+                                  initargs=(interpreter,) if in_process else ()) as pool:
+            pending = [(arguments, pool.apply_async(run_test, (arguments,))) for arguments in work]
+            work = []
+            for index, (arguments, async_result) in enumerate(pending):
+                start = time.perf_counter()
+                try:
+                    results.append(async_result.get(timeout + worker_grace_time if timeout else None))
+                except multiprocessing.TimeoutError:  # test hangs, leaving the pool terminates its workers
+                    results.append((arguments[0], 'timeout after ' + str(timeout) + ' s (worker terminated)',
+                                    time.perf_counter() - start))
+                    for rest_arguments, rest_result in pending[index + 1:]:
+                        if rest_result.ready():
+                            results.append(rest_result.get())
+                        else:
+                            work.append(rest_arguments)
+                    break
+    order = {test: index for index, test in enumerate(tests)}
+    return sorted(results, key=lambda result: order[result[0]])
+
+
+# reads result cache (test -> key and result), empty cache if the file is missing or invalid
+def load_cache(cache_file_name):
+    try:
+        with open(cache_file_name, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    return cache if cache.__class__ is dict else {}
+
+
+# writes result cache
+def save_cache(cache_file_name, cache):
+    try:
+        with open(cache_file_name, 'w') as cache_file:
+            json.dump(cache, cache_file, indent=1, sort_keys=True)
+    except OSError:  # cache cannot be written
+        sys.exit(12)
+
+
+# ### end of function definitions ### #
+
+
+# ### PROGRAM ARGUMENT PARSING ### #
+if __name__ == '__main__':  # worker processes may import this file
+    if len(sys.argv) == 2 and sys.argv[1] == '--help':
+        display_help()
+        sys.exit(0)
+
+    directory = '.'
+    interpreter = default_interpreter
+    jobs = os.cpu_count() or 1
+    timeout = default_timeout
+    slowest = default_slowest
+    cache_file_name = None
+    recursive = False
+    in_process = True
+    changed_only = False
+    interpreter_options = []  # options passed to tested interpreter
+    for argument in sys.argv[1:]:
+        option = re.fullmatch(r'^--(directory|interpreter|jobs|timeout|slowest|cache)=(.+)$', argument)
+        if option is not None:
+            name, value = option.group(1, 2)
+            if name in ('jobs', 'slowest') and re.fullmatch(r'\d+', value) is None:
+                sys.exit(10)  # number expected
+            if name == 'timeout' and re.fullmatch(r'\d+(?:\.\d*)?', value) is None:
+                sys.exit(10)
+            if name == 'directory':
+                directory = value
+            elif name == 'interpreter':
+                interpreter = value
+            elif name == 'jobs':
+                jobs = max(1, int(value))
+            elif name == 'timeout':
+                timeout = float(value)
+            elif name == 'slowest':
+                slowest = int(value)
+            else:
+                cache_file_name = value
+        elif argument == '--recursive':
+            recursive = True
+        elif argument == '--subprocess':
+            in_process = False
+        elif argument == '--changed-only':
+            changed_only = True
+        elif re.fullmatch(r'--option=--[a-z\-]+(?:=.*)?', argument) is not None:
+            interpreter_options.append(argument[len('--option='):])
+        else:
+            sys.exit(10)  # unknown option
+    if not os.path.isdir(directory) or not os.path.isfile(interpreter):
+        sys.exit(11)
+    if cache_file_name is None:
+        cache_file_name = os.path.join(directory, default_cache_name)
+
+    # ### TESTING ### #
+    start = time.perf_counter()
+    tests = discover_tests(directory, recursive)
+    interpreter_hash = file_hash(interpreter) + ' '.join(interpreter_options)  # results differ with options
+    cache = load_cache(cache_file_name)
+    keys = {test: test_key(test, interpreter_hash) for test in tests}
+    if changed_only:  # tests which passed with the same key are skipped, failed tests are always run again
+        selected = [test for test in tests if cache.get(test, {}).get('key') != keys[test] or
+                    not cache[test].get('passed')]
+    else:
+        selected = tests
+
+    work = [(test, interpreter, timeout, in_process, interpreter_options) for test in selected]
+    if (jobs > 1 and len(work) > 1) or (in_process and timeout):  # in-process test may hang, worker can be killed
+        results = run_pool(work, jobs, in_process, interpreter, timeout)
+    else:
+        if in_process:
+            load_interpreter(interpreter)
+        results = [run_test(arguments) for arguments in work]
+
+    failed = 0
+    for test, message, elapsed in results:
+        print('  %-4s %8.3f s  %s%s' % ('ok' if message is None else 'FAIL', elapsed, os.path.relpath(test, directory),
+                                        '' if message is None else ': ' + message))
+        failed += message is not None
+        cache[test] = {'key': keys[test], 'passed': message is None, 'time': elapsed}
+    save_cache(cache_file_name, cache)
+
+    if results and slowest:
+        print('\nslowest tests:')
+        for test, _, elapsed in sorted(results, key=lambda result: -result[2])[:slowest]:
+            print('  %8.3f s  %s' % (elapsed, os.path.relpath(test, directory)))
+    print('\n' + str(len(tests)) + ' tests, ' + str(len(results)) + ' run, ' + str(len(tests) - len(results)) +
+          ' unchanged skipped, ' + str(len(results) - failed) + ' passed, ' + str(failed) + ' failed (' +
+          '%.3f' % sum(result[2] for result in results) + ' s of tests, ' + '%.3f' % (time.perf_counter() - start) +
+          ' s total)')
+    sys.exit(1 if failed else 0)
+
+# ### end of file ### #